@@ -1,6 +1,9 @@
 # pyright: strict
 
+from argparse import ArgumentParser
+from random import Random
 from typing import Final
+import sys
 
 import pyxel
 
@@ -14,25 +17,49 @@ C: Final[int] = 7
 DIM: Final[int] = 11
 BG: Final[int] = 0
 BG_MOUSE: Final[int] = 14
+COLOR_SELECTION: Final[int] = 7
 FONT_W: Final[int] = 3
 FONT_H: Final[int] = 5
+JOURNAL_CHANGES: Final[int] = 100_000
 
 
 class Counters(pg.PyxelGrid[int]):
-    def __init__(self) -> None:
-        super().__init__(R, C, dim=DIM)
+    """A grid of counters, modulo 10.
+
+    This doubles as a stress test for the renderer: every frame, `stress` random counters and
+    `stress_regions` random rectangular regions of counters are increased, as if by the player,
+    except that these changes can't be undone.
+
+    With `decay`, every counter that the player changed falls back by one every `decay` frames,
+    until it reaches 0. Only the decaying counters are updated, via `update_cell()`.
+    """
+
+    def __init__(self, r: int = R, c: int = C, dim: int = DIM, *,
+            stress: int = 0, stress_regions: int = 0, decay: int = 0,
+            seed: int | None = None) -> None:
+        self.stress = stress
+        self.stress_regions = stress_regions
+        self.decay = decay
+        self.rand = Random(seed)
+        self.anchor: tuple[int, int] | None = None
+        super().__init__(r, c, dim=dim, skip_idle_frames=True)
+        self.enable_journal(max_changes=JOURNAL_CHANGES)
+        if decay:
+            self.enable_cell_updates(wake_radius=None)
 
 
     def init(self) -> None:
         pyxel.mouse(True)  # show mouse
         self.reset()
+        self.clear_journal()
 
 
     def reset(self) -> None:
         # initialize everything to zero
-        for i in range(self.r):
-            for j in range(self.c):
-                self[i, j] = 0
+        with self.transaction():
+            for i in range(self.r):
+                for j in range(self.c):
+                    self[i, j] = 0
 
 
     def update(self) -> None:
@@ -40,20 +67,87 @@ class Counters(pg.PyxelGrid[int]):
         if pyxel.btnp(pyxel.KEY_R):
             self.reset()
 
+        # Z = undo, Y = redo
+        if pyxel.btnp(pyxel.KEY_Z):
+            self.undo()
+        if pyxel.btnp(pyxel.KEY_Y):
+            self.redo()
+
         # left click = increase
+        # shift + left drag = increase a whole region
         if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
             i, j = self.mouse_cell()
-            self.update_counter(i, j, +1)
+            if pyxel.btn(pyxel.KEY_SHIFT):
+                self.anchor = i, j
+                # the selection's sum is only shown while dragging, so only track sums then
+                self.enable_region_sums(int)
+            else:
+                self.update_counter(i, j, +1)
+
+        if self.anchor is not None and pyxel.btnr(pyxel.MOUSE_BUTTON_LEFT):
+            self.update_region(*self.selection(), +1)
+            self.anchor = None
+            self.disable_region_sums()
 
         # right click = decrease
         if pyxel.btnp(pyxel.MOUSE_BUTTON_RIGHT):
             i, j = self.mouse_cell()
             self.update_counter(i, j, -1)
 
+        self.synthetic_input()
+
+
+    def synthetic_input(self) -> None:
+        # this is benchmark load, not the player's doing, so it isn't recorded for undo
+        rand = self.rand
+        with self.unrecorded():
+            for _ in range(self.stress):
+                self.update_counter(rand.randrange(self.r), rand.randrange(self.c), +1)
+            for _ in range(self.stress_regions):
+                i0, i1 = sorted((rand.randrange(self.r + 1), rand.randrange(self.r + 1)))
+                j0, j1 = sorted((rand.randrange(self.c + 1), rand.randrange(self.c + 1)))
+                self.update_region(i0, j0, i1, j1, +1)
+
 
     def update_counter(self, i: int, j: int, delta: int) -> None:
         if self.in_bounds(i, j):
             self[i, j] = (self[i, j] + delta) % 10
+            if self.decay:
+                self.wake(i, j, self.decay)
+
+
+    def update_region(self, i0: int, j0: int, i1: int, j1: int, delta: int) -> None:
+        # rows i0 to i1 - 1, columns j0 to j1 - 1; the parts outside the grid are ignored
+        with self.transaction():
+            for i in range(max(i0, 0), min(i1, self.r)):
+                for j in range(max(j0, 0), min(j1, self.c)):
+                    self[i, j] = (self[i, j] + delta) % 10
+                    if self.decay:
+                        self.wake(i, j, self.decay)
+
+
+    def update_cell(self, i: int, j: int) -> int | None:
+        # decay; this isn't the player's doing, so it isn't recorded for undo
+        if not (value := self[i, j]):
+            return None
+        with self.unrecorded():
+            self[i, j] = value - 1
+        return self.decay if value > 1 else None
+
+
+    def replayed_cell(self, i: int, j: int) -> None:
+        # undone and redone changes decay like any other, even if the cell has already decayed
+        if self.decay:
+            self.wake(i, j, self.decay)
+
+
+    def selection(self) -> tuple[int, int, int, int]:
+        # the region between the drag anchor and the mouse, in the same form as update_region,
+        # clipped to the grid
+        assert self.anchor is not None
+        (ia, ja), (im, jm) = self.anchor, self.mouse_cell()
+        return (max(min(ia, im), 0), max(min(ja, jm), 0),
+                min(max(ia, im) + 1, self.r), min(max(ja, jm) + 1, self.c))
 
 
     def draw_cell(self, i: int, j: int, x: int, y: int) -> None:
@@ -75,8 +169,52 @@ class Counters(pg.PyxelGrid[int]):
         pyxel.cls(BG)
 
 
+    def post_draw_grid(self) -> None:
+        # outline the region being selected
+        if self.anchor is not None:
+            i0, j0, i1, j1 = self.selection()
+            pyxel.rectb(self.x(j0), self.y(i0), self.x(j1) - self.x(j0), self.y(i1) - self.y(i0),
+                    COLOR_SELECTION)
+
+            # and the sum of its counters, next to the mouse
+            total = str(self.region_sum(i0, j0, i1, j1))
+            x, y = pyxel.mouse_x + 4, pyxel.mouse_y - FONT_H - 2
+            pyxel.rect(x - 1, y - 1, len(total) * (FONT_W + 1) + 1, FONT_H + 2, BG)
+            pyxel.text(x, y, total, COLOR_SELECTION)
+
+
 def main():
-    Counters().run(title=TITLE, fps=FPS)
+    parser = ArgumentParser()
+
+    parser.add_argument('-r', type=int, default=R)
+    parser.add_argument('-c', type=int, default=C)
+    parser.add_argument('--dim', type=int, default=DIM)
+    parser.add_argument('--stress', type=int, default=0,
+            help="random counters to increase every frame")
+    parser.add_argument('--stress-regions', type=int, default=0,
+            help="random regions to increase every frame")
+    parser.add_argument('--decay', type=int, default=0,
+            help="make changed counters fall back by one every DECAY frames")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--stats', action='store_true',
+            help="print the frame rate and update/draw timings on exit (implied by stress mode)")
+    parser.add_argument('--alloc-stats', action='store_true',
+            help="print the memory allocated per frame phase, and where, on exit")
+    parser.add_argument('--export', nargs='?', const='', metavar='NAME',
+            help="mirror the counters into shared memory (named NAME, if given) for watch_grid.py")
+
+    args = parser.parse_args()
+
+    game = Counters(args.r, args.c, args.dim,
+            stress=args.stress, stress_regions=args.stress_regions, decay=args.decay,
+            seed=args.seed)
+    if args.stats or args.stress or args.stress_regions:
+        game.enable_frame_stats()
+    if args.alloc_stats:
+        game.enable_allocation_stats()
+    if args.export is not None:
+        print(f"exporting to {game.enable_export(int, args.export or None)}", file=sys.stderr)
+    game.run(title=TITLE, fps=FPS)
 
 
 if __name__ == '__main__':
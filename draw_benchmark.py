@@ -0,0 +1,130 @@
+# pyright: strict
+
+"""Compares drawing with and without batching the cells filled via `PyxelGrid.fill_cell`.
+
+Each scenario is drawn for `--frames` frames with `batch_fills` off (one `pyxel.rect` per filled
+cell) and on (runs of filled cells merged into larger rectangles), and the number of pyxel drawing
+calls and the time per frame are printed for both. The drawn pixels are the same either way.
+
+This opens a pyxel window, since drawing needs one, but doesn't run the game loop.
+
+.. highlight:: bash
+.. code-block:: bash
+
+    python draw_benchmark.py --frames 200
+"""
+
+from argparse import ArgumentParser
+from collections import Counter
+from collections.abc import Callable
+from random import Random
+from time import perf_counter
+from typing import Any, Final
+import os
+import sys
+
+ROOT: Final[str] = os.path.dirname(os.path.abspath(__file__))
+for example in 'maze', 'lightsout':
+    sys.path.append(os.path.join(ROOT, example))
+
+import pyxel
+
+import pyxelgrid as pg
+from lightsout import LightsOutGame
+from lightsout_puzzles import generate_puzzle
+from maze import MazeGame, State
+
+
+DEFAULT_FRAMES: Final[int] = 100
+DRAW_FUNCTIONS: Final[tuple[str, ...]] = (
+    'cls', 'pset', 'line', 'rect', 'rectb', 'circ', 'circb', 'tri', 'trib', 'blt', 'text',
+)
+
+
+def explored_maze(solid: bool) -> MazeGame:
+    game = MazeGame()
+    game.rand = Random(0)
+    game.init()
+    game.solid = solid
+    for i in range(game.r):
+        for j in range(game.c):
+            game[i, j] = State.of(game[i, j].cell_type, seen=True)
+    return game
+
+
+def fresh_maze() -> MazeGame:
+    game = MazeGame()
+    game.rand = Random(0)
+    game.init()
+    return game
+
+
+def lights_out(n: int) -> LightsOutGame:
+    # the puzzle is generated right away, rather than in the background as by new_game()
+    game = LightsOutGame(n)
+    game.init()
+    game.cancel_tasks()
+    game.start_puzzle(generate_puzzle(n, n, game.min_presses, 0))
+    return game
+
+
+SCENARIOS: Final[list[tuple[str, Callable[[], pg.PyxelGrid[Any]]]]] = [
+    ("maze, new game", fresh_maze),
+    ("maze, explored, solid walls", lambda: explored_maze(solid=True)),
+    ("maze, explored, cloudy walls", lambda: explored_maze(solid=False)),
+    ("lights out 8x8", lambda: lights_out(8)),
+    ("lights out 32x32", lambda: lights_out(32)),
+]
+
+
+def count_calls() -> Counter[str]:
+    """Wraps pyxel's drawing functions so that every call is counted in the returned counter."""
+    calls: Counter[str] = Counter()
+
+    def counted(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            calls[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+
+    for name in DRAW_FUNCTIONS:
+        setattr(pyxel, name, counted(name, getattr(pyxel, name)))
+    return calls
+
+
+def measure(game: pg.PyxelGrid[Any], frames: int, calls: Counter[str]) -> tuple[float, float]:
+    """Returns the drawing calls and the milliseconds per frame."""
+    game.request_redraw()
+    game._draw()  # pyright: ignore[reportPrivateUsage]
+    calls.clear()
+    start = perf_counter()
+    for _ in range(frames):
+        game.request_redraw()
+        game._draw()  # pyright: ignore[reportPrivateUsage]
+    elapsed = perf_counter() - start
+    return calls.total() / frames, elapsed / frames * 1000
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the batching of filled cells.")
+
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES)
+
+    args = parser.parse_args()
+
+    pyxel.init(320, 320, title="draw benchmark")
+    calls = count_calls()
+
+    print(f"{'scenario':<32}{'calls':>10}{'batched':>10}{'ratio':>8}{'ms':>10}{'batched':>10}")
+    for name, create in SCENARIOS:
+        game = create()
+        game.batch_fills = False
+        calls_off, time_off = measure(game, args.frames, calls)
+        game.batch_fills = True
+        calls_on, time_on = measure(game, args.frames, calls)
+        print(f"{name:<32}{calls_off:>10.0f}{calls_on:>10.0f}{calls_off / calls_on:>7.1f}x"
+                f"{time_off:>10.3f}{time_on:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,20 @@
 # pyright: strict
 
-from collections.abc import Iterable
-from dataclasses import dataclass
-from enum import Enum
-from itertools import islice, product
+from argparse import ArgumentParser
+from itertools import product
 from random import Random
 from typing import Final
+import os
 
 import pyxel
 
 import pyxelgrid as pg
+from fruit_rules import (C, FPS, GREAT_FRUIT_TYPES, HP_DEC, HP_DENOM, HP_INIT, R, Cell, Fruit,
+        best_window, distribute, fruit_dhp, frame_wait_for_frame, window_values)
 
 
 TITLE: Final[str] = "Fruit"
 FRUIT_RESOURCE_FILE: Final[str] = "fruit.pyxres"
-FPS: Final[int] = 60
-
-# grid size
-
-R: Final[int] = 10
-C: Final[int] = 20
 
 # dimensions
 
@@ -43,17 +38,9 @@ COLOR_BG_MOUSE: Final[int] = 14
 
 COLOR_RESOURCE_TRANSPARENT: Final[int] = 0
 
-
-# HP details
-
-HP_INIT: Final[int] = 100
-HP_DEC: Final[int] = 6
-HP_DENOM: Final[int] = 1000
-
-DHP_ROTTEN_MUL: Final[int] = -10
-DHP_MUL: Final[int] = 5
-DHP_BASE_GOOD: Final[int] = 3
-DHP_BASE: Final[int] = 1
+COLOR_ADVICE_GOOD: Final[int] = 11
+COLOR_ADVICE_BAD: Final[int] = 8
+COLOR_ADVICE_BEST: Final[int] = 10
 
 
 # SFX details
@@ -70,37 +57,12 @@ SFX_CH_BAD: Final[int] = 1
 SFX_CH_GAME_OVER: Final[int] = 2
 
 
-def shuffled[T](rand: Random, seq: Iterable[T]) -> list[T]:
-    seql = list(seq)
-    rand.shuffle(seql)
-    return seql
-
-
-def frame_wait_for_frame(framec: int) -> int:
-    assert framec >= 0
-    base = int(round(FPS / 5 * 6 * max(1 / 4.5, 90 / 60 * 1.25 / (1.7 * framec / FPS / 60 + 1.25))))
-    return base - max(0, min(11, int(framec / FPS / 60) - 4))
-
-assert frame_wait_for_frame(10**18) >= 5
-
-
-class FruitType(Enum):
-    MANGO = 0
-    BANANA = 1
-    APPLE = 2
-
-@dataclass(frozen=True)
-class Fruit:
-    fruit_type: FruitType
-    rotten: bool = False
-
-
-GREAT_FRUIT_TYPES: Final[frozenset[FruitType]] = frozenset({FruitType.APPLE})
-
-
 class FruitGame(pg.PyxelGrid[Fruit | None]):
     def __init__(self) -> None:
         self.rand = Random()
+        self.show_advice = False
+        # the HP change from clicking each cell whose 3x3 window holds some fruit
+        self.advice: dict[Cell, int] = {}
         super().__init__(R, C,
             x_l=PADDING,
             x_r=PADDING,
@@ -111,7 +73,7 @@ class FruitGame(pg.PyxelGrid[Fruit | None]):
 
     def init(self) -> None:
         pyxel.mouse(True)  # show mouse
-        pyxel.load(FRUIT_RESOURCE_FILE)
+        pg.load_resource(os.path.join(os.path.dirname(__file__), FRUIT_RESOURCE_FILE))
 
         self.new_game()
 
@@ -122,6 +84,10 @@ class FruitGame(pg.PyxelGrid[Fruit | None]):
         if pyxel.btnp(pyxel.KEY_N):
             self.new_game()
 
+        # A = toggle advisor
+        if pyxel.btnp(pyxel.KEY_A):
+            self.show_advice = not self.show_advice
+
         # game logic
         if not self.game_over:
             self.game_logic_update()
@@ -172,20 +138,27 @@ class FruitGame(pg.PyxelGrid[Fruit | None]):
 
     def distribute_fruits(self) -> None:
 
-        cells = [(i, j) for i in range(self.r) for j in range(self.c)]
-
         # clear all cells
-        for i, j in cells:
-            self[i, j] = None
+        for i in range(self.r):
+            for j in range(self.c):
+                self[i, j] = None
 
         # distribute fruits to random cells
-        scells = iter(shuffled(self.rand, cells))
-        for i, j in islice(scells, 4): self[i, j] = Fruit(FruitType.MANGO)
-        for i, j in islice(scells, 4): self[i, j] = Fruit(FruitType.BANANA)
-        for i, j in islice(scells, 1): self[i, j] = Fruit(FruitType.APPLE)
-        for i, j in islice(scells, 3): self[i, j] = Fruit(FruitType.MANGO, rotten=True)
-        for i, j in islice(scells, 3): self[i, j] = Fruit(FruitType.BANANA, rotten=True)
-        for i, j in islice(scells, 1): self[i, j] = Fruit(FruitType.APPLE, rotten=True)
+        fruits = distribute(self.rand, self.r, self.c)
+        for (i, j), fruit in fruits.items():
+            self[i, j] = fruit
+
+        # the advice only changes when the fruits do
+        self.advice = window_values(fruits)
+
+
+    def best_click(self) -> Cell | None:
+        """Returns the cell whose 3x3 window is worth the most HP, or `None` if no window is worth a
+        positive amount."""
+        best = best_window(self.advice, self.r, self.c)
+        if best is None or best[0] <= 0:
+            return None
+        return best[1]
 
 
     def consume(self, ic: int, jc: int) -> None:
@@ -198,9 +171,7 @@ class FruitGame(pg.PyxelGrid[Fruit | None]):
         for di, dj in product((-1, 0, +1), repeat=2):
             if self.in_bounds(i := ic + di, j := jc + dj) and (fruit := self[i, j]):
                 great = fruit.fruit_type in GREAT_FRUIT_TYPES
-                base = DHP_BASE_GOOD if great else DHP_BASE
-                mult = DHP_ROTTEN_MUL if fruit.rotten else DHP_MUL
-                delta = base * mult
+                delta = fruit_dhp(fruit)
                 self.score += max(delta, 0)
                 self.hp += delta
 
@@ -261,19 +232,49 @@ class FruitGame(pg.PyxelGrid[Fruit | None]):
         pyxel.text(PADDING, PADDING, str(self.score), COLOR_TEXT_INFO)
 
         # controls
-        pyxel.text(self.x_l + self.c * self.dim * 2 / 3, PADDING, "N = NEW GAME", COLOR_TEXT_INFO)
+        pyxel.text(self.x_l + self.c * self.dim * 2 / 3, PADDING, "N = NEW GAME, A = ADVISOR",
+                COLOR_TEXT_INFO)
 
         # game-over text
         if self.game_over:
             pyxel.text(self.x_l + self.c * self.dim / 3, PADDING, "GAME OVER!", COLOR_TEXT_GAME_OVER)
 
+        # advisor
+        if self.show_advice and not self.game_over:
+            self.draw_advice()
+
         # HP bar
         frac = max(0, min(1, self.hp / HP_DENOM))
         pyxel.rect(PADDING, self.y(self.r) + IPADDING, frac * self.dim * self.c, FOOT, COLOR_HP_BAR)
 
 
+    def draw_advice(self) -> None:
+        # the HP change of every window that holds some fruit, over its center
+        for (i, j), dhp in self.advice.items():
+            if self.in_bounds(i, j) and dhp:
+                text = f"{dhp:+}"
+                x = self.x(j) + (self.dim - len(text) * 4 + 1) // 2
+                y = self.y(i) + (self.dim - 5) // 2
+                pyxel.rect(x - 1, y - 1, len(text) * 4 + 1, 7, COLOR_BG)
+                pyxel.text(x, y, text, COLOR_ADVICE_GOOD if dhp > 0 else COLOR_ADVICE_BAD)
+
+        if (best := self.best_click()) is not None:
+            i, j = best
+            pyxel.rectb(self.x(j - 1), self.y(i - 1), self.dim * 3, self.dim * 3, COLOR_ADVICE_BEST)
+
+
 def main():
-    FruitGame().run(title=TITLE, fps=FPS)
+    parser = ArgumentParser()
+
+    parser.add_argument('--latency', action='store_true',
+            help="print the input-to-display latencies on exit")
+
+    args = parser.parse_args()
+
+    game = FruitGame()
+    if args.latency:
+        game.enable_latency_stats()
+    game.run(title=TITLE, fps=FPS)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,142 @@
+# pyright: strict
+
+"""The rules of the Fruit game, independent of pyxel input and drawing.
+
+Nothing here imports pyxel, so the rules can be shared between the game itself (`fruit.py`) and
+headless tools like the strategy simulator (`fruit_sim.py`). Balancing the game means tuning the
+constants in this file.
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from enum import Enum
+from functools import cache
+from itertools import product
+from random import Random
+from typing import Final
+
+
+FPS: Final[int] = 60
+
+# grid size
+
+R: Final[int] = 10
+C: Final[int] = 20
+
+Cell = tuple[int, int]
+
+
+# HP details
+
+HP_INIT: Final[int] = 100
+HP_DEC: Final[int] = 6
+HP_DENOM: Final[int] = 1000
+
+DHP_ROTTEN_MUL: Final[int] = -10
+DHP_MUL: Final[int] = 5
+DHP_BASE_GOOD: Final[int] = 3
+DHP_BASE: Final[int] = 1
+
+
+def frame_wait_for_frame(framec: int) -> int:
+    assert framec >= 0
+    base = int(round(FPS / 5 * 6 * max(1 / 4.5, 90 / 60 * 1.25 / (1.7 * framec / FPS / 60 + 1.25))))
+    return base - max(0, min(11, int(framec / FPS / 60) - 4))
+
+assert frame_wait_for_frame(10**18) >= 5
+
+
+class FruitType(Enum):
+    MANGO = 0
+    BANANA = 1
+    APPLE = 2
+
+@dataclass(frozen=True, slots=True)
+class Fruit:
+    fruit_type: FruitType
+    rotten: bool = False
+
+    @staticmethod
+    def of(fruit_type: FruitType, rotten: bool = False) -> 'Fruit':
+        """Returns the shared instance with the given fields."""
+        return FRUITS[fruit_type, rotten]
+
+
+# fruits are immutable, so every cell holding the same kind of fruit shares one instance
+FRUITS: Final[dict[tuple[FruitType, bool], Fruit]] = {
+    (fruit_type, rotten): Fruit(fruit_type, rotten)
+    for fruit_type in FruitType for rotten in (False, True)
+}
+
+
+GREAT_FRUIT_TYPES: Final[frozenset[FruitType]] = frozenset({FruitType.APPLE})
+
+
+# how many of each fruit is placed on every redistribution, in placement order
+DISTRIBUTION: Final[tuple[tuple[Fruit, int], ...]] = (
+    (Fruit.of(FruitType.MANGO), 4),
+    (Fruit.of(FruitType.BANANA), 4),
+    (Fruit.of(FruitType.APPLE), 1),
+    (Fruit.of(FruitType.MANGO, rotten=True), 3),
+    (Fruit.of(FruitType.BANANA, rotten=True), 3),
+    (Fruit.of(FruitType.APPLE, rotten=True), 1),
+)
+
+
+def fruit_dhp(fruit: Fruit) -> int:
+    """Returns the change in HP from eating `fruit`."""
+    base = DHP_BASE_GOOD if fruit.fruit_type in GREAT_FRUIT_TYPES else DHP_BASE
+    mult = DHP_ROTTEN_MUL if fruit.rotten else DHP_MUL
+    return base * mult
+
+
+# the change in HP from eating each kind of fruit
+FRUIT_DHPS: Final[dict[Fruit, int]] = {fruit: fruit_dhp(fruit) for fruit in FRUITS.values()}
+
+
+def distribute(rand: Random, r: int, c: int) -> dict[Cell, Fruit]:
+    """Places the fruits of `DISTRIBUTION` on distinct random cells of an `r` by `c` board.
+
+    Returns a mapping from cell to fruit; cells that aren't in the mapping are empty.
+    """
+    total = sum(count for _, count in DISTRIBUTION)
+    scells = iter(rand.sample(range(r * c), total))
+    placed: dict[Cell, Fruit] = {}
+    for fruit, count in DISTRIBUTION:
+        for _ in range(count):
+            i, j = divmod(next(scells), c)
+            placed[i, j] = fruit
+    return placed
+
+
+def window_values(fruits: Mapping[Cell, Fruit]) -> dict[Cell, int]:
+    """Returns the HP change from clicking each center whose 3x3 window holds some fruit.
+
+    This is the 3x3 box sum of the HP changes of the fruits, computed by adding each fruit's
+    change to the nine centers around it, so it takes time proportional to the number of fruits
+    rather than to the size of the board. Centers missing from the result would eat nothing.
+    Centers in the ring just outside the board are included, since the game's padding lets the
+    player click there.
+    """
+    values: dict[Cell, int] = {}
+    for (i, j), fruit in fruits.items():
+        dhp = FRUIT_DHPS[fruit]
+        for cell in window(i, j):
+            values[cell] = values.get(cell, 0) + dhp
+    return values
+
+
+@cache
+def window(i: int, j: int) -> tuple[Cell, ...]:
+    """Returns the cells of the 3x3 window centered at `(i, j)`."""
+    return tuple((i + di, j + dj) for di, dj in product((-1, 0, +1), repeat=2))
+
+
+def best_window(values: Mapping[Cell, int], r: int, c: int) -> tuple[int, Cell] | None:
+    """Returns the HP change and the center of the most valuable window centered on the `r` by
+    `c` board, given the `window_values()`.
+
+    Returns `None` if no window on the board holds any fruit.
+    """
+    return max(((dhp, (i, j)) for (i, j), dhp in values.items() if 0 <= i < r and 0 <= j < c),
+            default=None)
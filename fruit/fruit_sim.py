@@ -0,0 +1,324 @@
+# pyright: strict
+
+"""A headless strategy simulator for balancing the Fruit game.
+
+This plays the rules in `fruit_rules` without pyxel, with a bot that clicks once every
+`frames_per_click` frames according to some strategy, and reports the distributions of survival
+times and scores over many games. The games are spread across a process pool, e.g.,
+
+.. highlight:: bash
+.. code-block:: bash
+
+    python fruit_sim.py --strategy greedy --games 1000000 --frames-per-click 30
+
+Survival time is measured in seconds of game time (at `FPS` frames per second). Games that are
+still going are stopped, and reported separately as "still alive", once they have settled (see
+`FruitSim.play`) or after `--max-minutes`.
+"""
+
+from argparse import ArgumentParser
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from math import sqrt
+from random import Random
+from typing import Final
+import os
+
+from fruit_rules import (C, FPS, FRUIT_DHPS, HP_DEC, HP_INIT, R, Cell, Fruit, best_window,
+        distribute, frame_wait_for_frame, window, window_values)
+
+
+DEFAULT_GAMES: Final[int] = 1_000
+DEFAULT_FRAMES_PER_CLICK: Final[int] = 30
+DEFAULT_MAX_MINUTES: Final[int] = 30
+STEADY_MINUTES: Final[int] = 5
+CHUNK_GAMES: Final[int] = 500
+HISTOGRAM_BINS: Final[int] = 20
+HISTOGRAM_WIDTH: Final[int] = 50
+
+
+def steady_frame() -> int:
+    """Returns the first frame from which `frame_wait_for_frame()` no longer changes.
+
+    The wait between HP decrements never grows with time, so this is the first frame whose wait is
+    the final one.
+    """
+    final = frame_wait_for_frame(10**18)
+    return bisect_left(range(10**18), True, key=lambda frame: frame_wait_for_frame(frame) == final)
+
+
+# from here on, the rules are the same every frame
+STEADY_FRAME: Final[int] = steady_frame()
+
+
+class Outcome(Enum):
+    OVER = 0  # the HP ran out
+    SETTLED = 1  # the HP kept rising after STEADY_FRAME
+    CAPPED = 2  # the game was stopped at max_frames
+
+
+class FruitSim:
+    """A single headless game of Fruit.
+
+    Timing follows `FruitGame.update` frame for frame: in a given frame, the click (if any) is
+    handled first, then the HP decrement (if due), then the game-over check. Frames in which
+    nothing happens are skipped over.
+    """
+
+    def __init__(self, rand: Random, r: int = R, c: int = C) -> None:
+        self.rand = rand
+        self.r = r
+        self.c = c
+        self.frame = 0
+        self.score = 0
+        self.hp = HP_INIT
+        self.frame_last = 0
+        self.frame_wait = frame_wait_for_frame(0)
+        self.fruits: dict[Cell, Fruit] = {}
+        self._values: dict[Cell, int] | None = None
+        self.distribute_fruits()
+
+    def in_bounds(self, i: int, j: int) -> bool:
+        return 0 <= i < self.r and 0 <= j < self.c
+
+    def distribute_fruits(self) -> None:
+        self.fruits = distribute(self.rand, self.r, self.c)
+        self._values = None
+
+    def window_values(self) -> dict[Cell, int]:
+        """Returns the `fruit_rules.window_values()` of the board, computed once per distribution
+        of fruits."""
+        if self._values is None:
+            self._values = window_values(self.fruits)
+        return self._values
+
+    def consume(self, ic: int, jc: int) -> bool:
+        """Eats the 3x3 window centered at `(ic, jc)`, like `FruitGame.consume`.
+
+        Returns whether anything was eaten.
+        """
+        ate = False
+        for cell in window(ic, jc):
+            if (fruit := self.fruits.get(cell)) is not None:
+                dhp = FRUIT_DHPS[fruit]
+                self.score += max(dhp, 0)
+                self.hp += dhp
+                ate = True
+
+        if ate:
+            self.distribute_fruits()
+        return ate
+
+    def dec_hp(self) -> None:
+        self.frame_last = self.frame
+        self.frame_wait = frame_wait_for_frame(self.frame)
+        self.hp -= HP_DEC
+
+    def play(self, strategy: 'Strategy', frames_per_click: int, max_frames: int) -> Outcome:
+        """Plays until the game is over, until it has settled, or until `max_frames` frames have
+        passed.
+
+        From `STEADY_FRAME` on, the rules no longer change, so a strategy that keeps gaining HP
+        there can keep going indefinitely. The game counts as settled once its HP has risen over
+        each of `STEADY_MINUTES` consecutive minutes past that frame.
+        """
+        next_click = frames_per_click
+        next_check = STEADY_FRAME
+        checked_hp: int | None = None
+        rises = 0
+        while self.hp > 0:
+            next_dec = self.frame_last + self.frame_wait
+            self.frame = min(next_click, next_dec, next_check)
+            if self.frame > max_frames:
+                self.frame = max_frames
+                return Outcome.CAPPED
+
+            if self.frame == next_click:
+                if (cell := strategy(self)) is not None:
+                    self.consume(*cell)
+                next_click += frames_per_click
+
+            if self.frame == next_dec:
+                self.dec_hp()
+
+            if self.frame == next_check and self.hp > 0:
+                rises = rises + 1 if checked_hp is not None and self.hp > checked_hp else 0
+                if rises >= STEADY_MINUTES:
+                    return Outcome.SETTLED
+                checked_hp = self.hp
+                next_check += 60 * FPS
+
+        return Outcome.OVER
+
+
+Strategy = Callable[[FruitSim], Cell | None]
+
+
+def random_strategy(sim: FruitSim) -> Cell | None:
+    """Clicks a uniformly random cell of the board."""
+    return sim.rand.randrange(sim.r), sim.rand.randrange(sim.c)
+
+
+def greedy_strategy(sim: FruitSim) -> Cell | None:
+    """Clicks the cell of the board whose 3x3 window is worth the most HP.
+
+    Doesn't click at all if no window is worth a positive amount.
+    """
+    best = best_window(sim.window_values(), sim.r, sim.c)
+    if best is None or best[0] <= 0:
+        return None
+    return best[1]
+
+
+def optimal_strategy(sim: FruitSim) -> Cell | None:
+    """Clicks the most valuable window among all clickable centers, including the outer ring.
+
+    Every meal redistributes the fruits at random, so what comes after a meal doesn't depend on
+    which window was eaten, and maximizing each meal is optimal. A window worth negative HP is
+    still eaten, since a fresh board is worth more than an idle click, unless eating it would end
+    the game.
+    """
+    values = sim.window_values()
+    if not values:
+        return None
+    dhp, cell = max((dhp, cell) for cell, dhp in values.items())
+    if dhp > 0 or sim.hp + dhp > 0:
+        return cell
+    return None
+
+
+STRATEGIES: Final[dict[str, Strategy]] = {
+    'random': random_strategy,
+    'greedy': greedy_strategy,
+    'optimal': optimal_strategy,
+}
+
+
+Job = tuple[str, int, int, int, int, int, int, int]
+
+
+Results = tuple[Counter[int], Counter[int], Counter[int], int]
+
+
+def run_chunk(job: Job) -> Results:
+    """Plays a chunk of games; returns the survival-second and score histograms of the games that
+    were over, the score histogram of the games that were still alive, and how many of those had
+    settled.
+
+    Game `k` of a run seeded with `seed` always plays out the same way, no matter how the games
+    are split into chunks.
+    """
+    name, seed, start, games, r, c, frames_per_click, max_frames = job
+    strategy = STRATEGIES[name]
+    survival: Counter[int] = Counter()
+    scores: Counter[int] = Counter()
+    alive_scores: Counter[int] = Counter()
+    settled = 0
+    for k in range(start, start + games):
+        sim = FruitSim(Random(seed << 32 | k), r, c)
+        outcome = sim.play(strategy, frames_per_click, max_frames)
+        if outcome is Outcome.OVER:
+            survival[sim.frame // FPS] += 1
+            scores[sim.score] += 1
+        else:
+            alive_scores[sim.score] += 1
+            settled += outcome is Outcome.SETTLED
+    return survival, scores, alive_scores, settled
+
+
+def jobs(name: str, seed: int, games: int, r: int, c: int, frames_per_click: int,
+        max_frames: int) -> Iterator[Job]:
+    for start in range(0, games, CHUNK_GAMES):
+        yield name, seed, start, min(CHUNK_GAMES, games - start), r, c, frames_per_click, max_frames
+
+
+def tally(results: Iterable[Results]) -> Results:
+    survival: Counter[int] = Counter()
+    scores: Counter[int] = Counter()
+    alive_scores: Counter[int] = Counter()
+    settled = 0
+    for chunk_survival, chunk_scores, chunk_alive_scores, chunk_settled in results:
+        survival += chunk_survival
+        scores += chunk_scores
+        alive_scores += chunk_alive_scores
+        settled += chunk_settled
+    return survival, scores, alive_scores, settled
+
+
+def percentile(hist: Counter[int], q: float) -> int:
+    total = hist.total()
+    seen = 0
+    for value in sorted(hist):
+        seen += hist[value]
+        if seen >= q * total:
+            return value
+    raise ValueError("Empty histogram")
+
+
+def describe(label: str, hist: Counter[int]) -> None:
+    total = hist.total()
+    print(f"{label}: {total} games")
+    if not total:
+        return
+
+    mean = sum(value * count for value, count in hist.items()) / total
+    var = sum((value - mean)**2 * count for value, count in hist.items()) / total
+    print(f"  mean {mean:.2f}  stdev {sqrt(var):.2f}  min {min(hist)}  max {max(hist)}")
+    print("  " + "  ".join(f"p{round(q * 100)} {percentile(hist, q)}"
+            for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)))
+
+    lo, hi = min(hist), max(hist)
+    width = max(1, -(-(hi - lo + 1) // HISTOGRAM_BINS))
+    bins: Counter[int] = Counter()
+    for value, count in hist.items():
+        bins[(value - lo) // width] += count
+    peak = max(bins.values())
+    for b in range(max(bins) + 1):
+        bar = '#' * round(bins[b] / peak * HISTOGRAM_WIDTH)
+        print(f"  {lo + b * width:>8} {bins[b]:>10} {bar}")
+
+
+def main():
+    parser = ArgumentParser(description="Simulate many headless games of Fruit.")
+
+    parser.add_argument('--strategy', choices=[*STRATEGIES], default='greedy')
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--frames-per-click', type=int, default=DEFAULT_FRAMES_PER_CLICK)
+    parser.add_argument('--max-minutes', type=int, default=DEFAULT_MAX_MINUTES)
+    parser.add_argument('-r', type=int, default=R)
+    parser.add_argument('-c', type=int, default=C)
+
+    args = parser.parse_args()
+
+    if args.frames_per_click <= 0:
+        parser.error("--frames-per-click must be positive")
+
+    max_frames = args.max_minutes * 60 * FPS
+    chunks = jobs(args.strategy, args.seed, args.games, args.r, args.c, args.frames_per_click,
+            max_frames)
+
+    if args.workers <= 1:
+        survival, scores, alive_scores, settled = tally(map(run_chunk, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            survival, scores, alive_scores, settled = tally(pool.map(run_chunk, chunks))
+
+    print(f"strategy {args.strategy}, {args.r}x{args.c} board, "
+            f"one click every {args.frames_per_click} frames")
+    describe("survival time (s) of games over", survival)
+    describe("score of games over", scores)
+    if alive_scores:
+        capped = alive_scores.total() - settled
+        print(f"{settled} games settled (HP rising for {STEADY_MINUTES} minutes after "
+                f"{STEADY_FRAME // FPS} s) and {capped} still alive after {args.max_minutes} "
+                f"minutes")
+        describe("score of games still alive", alive_scores)
+
+
+if __name__ == '__main__':
+    main()
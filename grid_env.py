@@ -0,0 +1,443 @@
+# pyright: strict
+
+"""Gym-style batched environments over the example games, for training and evaluating agents
+without a window.
+
+A `VectorEnv` runs `num_envs` independent instances of one game. `reset()` starts them all, and
+`step(actions)` takes one action per instance and returns the observations, rewards, and whether
+each episode terminated (the game was won or lost) or was truncated (it ran for `max_steps`
+steps). Finished instances start a new episode right away, as in Gym's vector environments, so
+the returned observation of a finished instance is the first one of its next episode.
+
+Observations are the cells of the board, one byte per cell, batched into a single `(num_envs, r,
+c)` memoryview (`numpy.asarray` takes it without copying). Actions are ints, mapped to the games'
+own moves:
+
+- ``maze``: `MazeGame.try_move`; 0 to 3 are up, down, left and right. Cells are 0 if unseen, 1 for
+  a path, 2 for an obstacle, 3 for the exit and 4 for the player. Reaching the exit is worth 1.
+- ``lightsout``: a press (as in `LightsOutGame.move`) on cell `(a // n, a % n)`. Cells are 1 if
+  lit. Turning off every light is worth 1. Boards are packed into ints (as in
+  `lightsout_puzzles`), so a step is a single XOR, and a batch of them is stepped in one loop
+  without any game objects.
+- ``fruit``: a click (`FruitSim.consume`) on cell `(a // c, a % c)`, or no click if `a == r*c`;
+  either way, the game then runs until the next click, `frames_per_click` frames later. Cells are
+  0 if empty, or 1 + 2*(the fruit type) + (1 if rotten). The reward is the change in HP.
+
+Instance `k` of a run seeded with `seed` always plays out the same way given the same actions, no
+matter how the instances are sharded across worker processes (`workers`), e.g.,
+
+.. highlight:: bash
+.. code-block:: bash
+
+    python grid_env.py maze --envs 256 --steps 200 --workers 4
+"""
+
+from abc import ABC, abstractmethod
+from argparse import ArgumentParser
+from collections.abc import Callable, Sequence
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from random import Random
+from time import perf_counter
+from typing import Any, Final
+import os
+import sys
+
+ROOT: Final[str] = os.path.dirname(os.path.abspath(__file__))
+for example in 'maze', 'lightsout', 'fruit':
+    sys.path.append(os.path.join(ROOT, example))
+
+import pyxelgrid as pg
+from fruit_rules import C as FRUIT_C, R as FRUIT_R
+from fruit_sim import DEFAULT_FRAMES_PER_CLICK, FruitSim
+from lightsout import DEFAULT_N
+from lightsout_puzzles import PuzzleGenerator, default_min_presses, press_effects
+from maze import CellType, MazeGame, State, generate_maze
+
+
+DEFAULT_ENVS: Final[int] = 64
+DEFAULT_STEPS: Final[int] = 1000
+DEFAULT_MAX_STEPS: Final[int] = 1000
+
+MAZE_MOVES: Final[tuple[tuple[int, int], ...]] = ((-1, 0), (+1, 0), (0, -1), (0, +1))
+MAZE_CODES: Final[dict[State, int]] = {
+    State.of(cell_type, seen): code if seen else 0
+    for cell_type, code in ((CellType.PATH, 1), (CellType.OBSTACLE, 2), (CellType.EXIT, 3))
+    for seen in (False, True)
+}
+MAZE_PLAYER: Final[int] = 4
+
+_LIGHTS: Final[bytes] = bytes.maketrans(b'01', b'\x00\x01')
+
+
+class GridEnv(ABC):
+    """A single headless game, played one action at a time.
+
+    Subclasses wrap the example games; see the module docstring for their actions and
+    observations.
+    """
+
+    r: int
+    c: int
+    actions: int  # the actions are 0 to actions - 1
+
+    @abstractmethod
+    def reset(self, seed: int) -> None:
+        """Starts a new episode, generated from `seed`."""
+
+    @abstractmethod
+    def step(self, action: int) -> tuple[float, bool]:
+        """Plays `action`, and returns the reward and whether the episode is over."""
+
+    @abstractmethod
+    def observe(self) -> bytes | bytearray:
+        """Returns the current observation, `r * c` bytes in row-major order."""
+
+
+class _ObservedMaze(MazeGame):
+    # keeps the observation up to date as the cells change, instead of reading every cell on
+    # every step
+    def __init__(self) -> None:
+        super().__init__()
+        self.cells = bytearray(self.r * self.c)
+        self._tracking = True
+
+    def _changed(self, ij: tuple[int, int], old: State | pg.Unset, new: State | pg.Unset) -> None:
+        super()._changed(ij, old, new)
+        i, j = ij
+        self.cells[i * self.c + j] = 0 if isinstance(new, pg.Unset) else MAZE_CODES[new]
+
+
+class MazeEnv(GridEnv):
+    def __init__(self) -> None:
+        self.game = _ObservedMaze()
+        self.r, self.c = self.game.r, self.game.c
+        self.actions = len(MAZE_MOVES)
+        super().__init__()
+
+    def reset(self, seed: int) -> None:
+        self.game.apply_layout(generate_maze(self.r, self.c, seed))
+
+    def step(self, action: int) -> tuple[float, bool]:
+        game = self.game
+        game.try_move(*MAZE_MOVES[action])
+        game.check_win()
+        return float(game.win), game.win
+
+    def observe(self) -> bytearray:
+        i, j = self.game.loc
+        cells = self.game.cells[:]
+        cells[i * self.c + j] = MAZE_PLAYER
+        return cells
+
+
+def _lights(board: int, cells: int) -> bytes:
+    # the observation of a packed board: bit i*c + j becomes byte i*c + j
+    return f'{board:0{cells}b}'[::-1].encode().translate(_LIGHTS)
+
+
+class LightsOutEnv(GridEnv):
+    def __init__(self, n: int = DEFAULT_N) -> None:
+        self.r = self.c = n
+        self.actions = n * n
+        self.generator = PuzzleGenerator(n, n)
+        self.min_presses = default_min_presses(n, n)
+        self.effects = press_effects(n, n)
+        self.board = 0
+        super().__init__()
+
+    def reset(self, seed: int) -> None:
+        self.generator.rand.seed(seed)
+        self.board = self.generator.generate(self.min_presses).board
+
+    def step(self, action: int) -> tuple[float, bool]:
+        self.board ^= self.effects[action]
+        return float(not self.board), not self.board
+
+    def observe(self) -> bytes:
+        return _lights(self.board, self.actions)
+
+
+class FruitEnv(GridEnv):
+    def __init__(self, r: int = FRUIT_R, c: int = FRUIT_C,
+            frames_per_click: int = DEFAULT_FRAMES_PER_CLICK) -> None:
+        self.r = r
+        self.c = c
+        self.actions = r * c + 1
+        self.frames_per_click = frames_per_click
+        self.sim = FruitSim(Random(0), r, c)
+        self.next_click = frames_per_click
+        super().__init__()
+
+    def reset(self, seed: int) -> None:
+        self.sim = FruitSim(Random(seed), self.r, self.c)
+        self.next_click = self.frames_per_click
+
+    def step(self, action: int) -> tuple[float, bool]:
+        # the same order of events as in `FruitSim.play`: the HP decrements due before the click,
+        # then the click, then the decrement due on the same frame as the click (if any)
+        sim = self.sim
+        hp = sim.hp
+        while sim.hp > 0:
+            next_dec = sim.frame_last + sim.frame_wait
+            sim.frame = min(self.next_click, next_dec)
+            clicked = sim.frame == self.next_click
+            if clicked and action < self.r * self.c:
+                sim.consume(*divmod(action, self.c))
+            if sim.frame == next_dec:
+                sim.dec_hp()
+            if clicked:
+                break
+        self.next_click += self.frames_per_click
+        return float(sim.hp - hp), sim.hp <= 0
+
+    def observe(self) -> bytearray:
+        cells = bytearray(self.r * self.c)
+        for (i, j), fruit in self.sim.fruits.items():
+            cells[i * self.c + j] = 1 + 2 * fruit.fruit_type.value + fruit.rotten
+        return cells
+
+
+ENVS: Final[dict[str, Callable[..., GridEnv]]] = {
+    'maze': MazeEnv,
+    'lightsout': LightsOutEnv,
+    'fruit': FruitEnv,
+}
+
+
+Step = tuple[list[bytes | bytearray], list[float], list[bool], list[bool]]
+
+
+class _Batch(ABC):
+    """Instances `start` to `start + count - 1` of a `VectorEnv`, stepped in one process."""
+
+    def __init__(self, seed: int, start: int, count: int, max_steps: int) -> None:
+        self.rands = [Random(seed << 32 | k) for k in range(start, start + count)]
+        self.steps = [0] * count
+        self.max_steps = max_steps
+        super().__init__()
+
+    @abstractmethod
+    def reset(self) -> list[bytes | bytearray]:
+        """Starts a new episode in every instance, and returns their observations."""
+
+    @abstractmethod
+    def step(self, actions: Sequence[int]) -> Step:
+        """Plays one action in every instance; see `VectorEnv.step()`."""
+
+
+class _EnvBatch(_Batch):
+    # one `GridEnv` per instance, stepped one after the other
+    def __init__(self, name: str, options: dict[str, Any], seed: int, start: int, count: int,
+            max_steps: int) -> None:
+        super().__init__(seed, start, count, max_steps)
+        self.envs = [ENVS[name](**options) for _ in range(count)]
+
+    def reset(self) -> list[bytes | bytearray]:
+        for env, rand in zip(self.envs, self.rands):
+            env.reset(rand.getrandbits(64))
+        self.steps = [0] * len(self.envs)
+        return [env.observe() for env in self.envs]
+
+    def step(self, actions: Sequence[int]) -> Step:
+        observations: list[bytes | bytearray] = []
+        rewards: list[float] = []
+        terminated: list[bool] = []
+        truncated: list[bool] = []
+        steps = self.steps
+        for k, (env, action) in enumerate(zip(self.envs, actions)):
+            reward, done = env.step(action)
+            steps[k] += 1
+            cut = not done and steps[k] >= self.max_steps
+            if done or cut:
+                env.reset(self.rands[k].getrandbits(64))
+                steps[k] = 0
+            observations.append(env.observe())
+            rewards.append(reward)
+            terminated.append(done)
+            truncated.append(cut)
+        return observations, rewards, terminated, truncated
+
+
+class _LightsOutBatch(_Batch):
+    # the packed boards of every instance in one list, stepped in a single loop; this plays out
+    # exactly like an `_EnvBatch` of `LightsOutEnv`s
+    def __init__(self, name: str, options: dict[str, Any], seed: int, start: int, count: int,
+            max_steps: int) -> None:
+        super().__init__(seed, start, count, max_steps)
+        self.env = LightsOutEnv(**options)
+        self.boards = [0] * count
+
+    def _new_board(self, k: int) -> int:
+        self.env.reset(self.rands[k].getrandbits(64))
+        return self.env.board
+
+    def reset(self) -> list[bytes | bytearray]:
+        self.boards = [self._new_board(k) for k in range(len(self.boards))]
+        self.steps = [0] * len(self.boards)
+        cells = self.env.actions
+        return [_lights(board, cells) for board in self.boards]
+
+    def step(self, actions: Sequence[int]) -> Step:
+        boards = self.boards
+        steps = self.steps
+        effects = self.env.effects
+        max_steps = self.max_steps
+        terminated = [False] * len(boards)
+        truncated = [False] * len(boards)
+        for k, action in enumerate(actions):
+            board = boards[k] ^ effects[action]
+            steps[k] += 1
+            if not board:
+                terminated[k] = True
+            elif steps[k] >= max_steps:
+                truncated[k] = True
+            else:
+                boards[k] = board
+                continue
+            boards[k] = self._new_board(k)
+            steps[k] = 0
+        cells = self.env.actions
+        observations: list[bytes | bytearray] = [_lights(board, cells) for board in boards]
+        return observations, [float(done) for done in terminated], terminated, truncated
+
+
+_BATCHES: Final[dict[str, Callable[..., _Batch]]] = {
+    'maze': _EnvBatch,
+    'lightsout': _LightsOutBatch,
+    'fruit': _EnvBatch,
+}
+
+
+def _serve(conn: Connection, name: str, *args: Any) -> None:
+    # the loop of a worker process: runs the commands sent by `VectorEnv` on its batch
+    batch = _BATCHES[name](name, *args)
+    while True:
+        command, actions = conn.recv()
+        if command == 'reset':
+            conn.send(batch.reset())
+        elif command == 'step':
+            conn.send(batch.step(actions))
+        else:
+            conn.close()
+            return
+
+
+class VectorEnv:
+    """`num_envs` independent instances of the game `name` (one of `ENVS`), created with
+    `options`; see the module docstring.
+
+    With `workers > 1`, the instances are split evenly across that many worker processes, which
+    step their shares in parallel. Call `close()` to stop them.
+    """
+
+    def __init__(self, name: str, num_envs: int, *, seed: int = 0,
+            max_steps: int = DEFAULT_MAX_STEPS, workers: int = 1, **options: Any) -> None:
+        if name not in ENVS:
+            raise ValueError(f"Unknown game {name!r}; expected one of {', '.join(ENVS)}")
+        if not num_envs > 0:
+            raise ValueError(f"num_envs must be positive; got {num_envs=}")
+
+        self.num_envs = num_envs
+        sample = ENVS[name](**options)
+        self.r, self.c, self.actions = sample.r, sample.c, sample.actions
+
+        workers = max(1, min(workers, num_envs))
+        bounds = [num_envs * w // workers for w in range(workers + 1)]
+        self._batch: _Batch | None = None
+        # Pipe() returns Connections, or PipeConnections on Windows
+        self._conns: list[Any] = []
+        self._processes: list[Process] = []
+        self._shards = [(start, end - start) for start, end in zip(bounds, bounds[1:])]
+        if workers == 1:
+            self._batch = _BATCHES[name](name, options, seed, 0, num_envs, max_steps)
+        else:
+            for start, count in self._shards:
+                conn, child = Pipe()
+                process = Process(target=_serve,
+                        args=(child, name, options, seed, start, count, max_steps), daemon=True)
+                process.start()
+                self._conns.append(conn)
+                self._processes.append(process)
+
+    def _observations(self, observations: list[bytes | bytearray]) -> memoryview:
+        return memoryview(b''.join(observations)).cast('B', (self.num_envs, self.r, self.c))
+
+    def reset(self) -> memoryview:
+        """Starts a new episode in every instance, and returns their observations."""
+        if self._batch is not None:
+            return self._observations(self._batch.reset())
+        for conn in self._conns:
+            conn.send(('reset', None))
+        return self._observations([obs for conn in self._conns for obs in conn.recv()])
+
+    def step(self, actions: Sequence[int]) -> tuple[memoryview, list[float], list[bool],
+            list[bool]]:
+        """Plays `actions[k]` in instance `k`, and returns the observations, rewards, and whether
+        each episode terminated or was truncated."""
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions; got {len(actions)}")
+        if self._batch is not None:
+            observations, rewards, terminated, truncated = self._batch.step(actions)
+            return self._observations(observations), rewards, terminated, truncated
+
+        for conn, (start, count) in zip(self._conns, self._shards):
+            conn.send(('step', actions[start:start + count]))
+        observations: list[bytes | bytearray] = []
+        rewards: list[float] = []
+        terminated: list[bool] = []
+        truncated: list[bool] = []
+        for conn in self._conns:
+            shard = conn.recv()
+            observations += shard[0]
+            rewards += shard[1]
+            terminated += shard[2]
+            truncated += shard[3]
+        return self._observations(observations), rewards, terminated, truncated
+
+    def close(self) -> None:
+        for conn in self._conns:
+            conn.send(('close', None))
+            conn.close()
+        for process in self._processes:
+            process.join()
+        self._conns.clear()
+        self._processes.clear()
+
+
+def main():
+    parser = ArgumentParser(description="Measure the throughput of a batched environment "
+            "stepped with random actions.")
+
+    parser.add_argument('game', choices=[*ENVS])
+    parser.add_argument('--envs', type=int, default=DEFAULT_ENVS)
+    parser.add_argument('--steps', type=int, default=DEFAULT_STEPS,
+            help="the number of batched steps")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+
+    env = VectorEnv(args.game, args.envs, seed=args.seed, workers=args.workers)
+    rand = Random(args.seed)
+    try:
+        env.reset()
+        episodes = 0
+        total = 0.0
+        start = perf_counter()
+        for _ in range(args.steps):
+            actions = [rand.randrange(env.actions) for _ in range(env.num_envs)]
+            _, rewards, terminated, truncated = env.step(actions)
+            total += sum(rewards)
+            episodes += sum(terminated) + sum(truncated)
+        elapsed = perf_counter() - start
+    finally:
+        env.close()
+
+    steps = args.steps * args.envs
+    print(f"{args.game}: {steps} steps in {elapsed:.3f} s, {steps / elapsed:.0f} steps/s; "
+            f"{episodes} episodes ended, total reward {total:.1f}")
+
+
+if __name__ == '__main__':
+    main()
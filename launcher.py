@@ -0,0 +1,155 @@
+# pyright: strict
+
+"""A single-process launcher that switches between the example games without restarting.
+
+pyxel is imported and initialized once. Each game's module is imported the first time the game is
+selected, and its instance is kept around afterwards, so switching back to a game just swaps the
+active `PyxelGrid` (along with its state and, via `pyxelgrid.load_resource`, its already-loaded
+resources).
+
+All games share one screen, sized to fit the largest example; smaller games are centered on it
+with `PyxelGrid.set_origin`, and the window itself is scaled by pyxel as usual.
+
+Controls: F1 to F7 select a game; every other key goes to the active game.
+
+Import and startup timings are printed to stderr as they happen, and summarized on exit.
+"""
+
+from argparse import ArgumentParser
+from collections.abc import Callable
+from dataclasses import dataclass
+from time import perf_counter
+from types import ModuleType
+from typing import Any, Final
+import atexit
+import importlib
+import os
+import sys
+
+
+TITLE: Final[str] = "PyxelGrid Examples"
+FPS: Final[int] = 60
+WIDTH: Final[int] = 356
+HEIGHT: Final[int] = 320
+ROOT: Final[str] = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass(frozen=True)
+class GameSpec:
+    title: str
+    directory: str
+    module: str
+    create: Callable[[ModuleType], Any]
+
+
+GAMES: Final[list[GameSpec]] = [
+    GameSpec("Counter Grid", 'counters', 'counters', lambda m: m.Counters()),
+    GameSpec("Counter Grid (padded)", 'counters', 'counters2', lambda m: m.Counters()),
+    GameSpec("Lights Out", 'lightsout', 'lightsout', lambda m: m.LightsOutGame(m.DEFAULT_N)),
+    GameSpec("Lights Out!", 'lightsout', 'lightsout_alt', lambda m: m.LightsOutGame(m.DEFAULT_N)),
+    GameSpec("Maze", 'maze', 'maze', lambda m: m.MazeGame()),
+    GameSpec("Fruit", 'fruit', 'fruit', lambda m: m.FruitGame()),
+    GameSpec("Life", 'life', 'life', lambda m: m.LifeGame(72, 86, 4)),
+]
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+class Launcher:
+    def __init__(self, width: int, height: int) -> None:
+        import pyxel
+        import pyxelgrid as pg
+
+        self.pyxel = pyxel
+        self.width = width
+        self.height = height
+        self.games: dict[int, pg.PyxelGrid[Any]] = {}
+        self.active: pg.PyxelGrid[Any] | None = None
+        self.timings: list[tuple[str, float]] = []
+        self.switch_keys = [getattr(pyxel, f'KEY_F{k + 1}') for k in range(len(GAMES))]
+        super().__init__()
+
+    def time(self, label: str, start: float) -> None:
+        elapsed = perf_counter() - start
+        self.timings.append((label, elapsed))
+        log(f"{label}: {elapsed * 1000:.1f} ms")
+
+    def load(self, index: int) -> Any:
+        spec = GAMES[index]
+
+        start = perf_counter()
+        path = os.path.join(ROOT, spec.directory)
+        if path not in sys.path:
+            sys.path.append(path)
+        module = importlib.import_module(spec.module)
+        self.time(f"import {spec.module}", start)
+
+        start = perf_counter()
+        game = spec.create(module)
+        if game.width > self.width or game.height > self.height:
+            log(f"{spec.title} is {game.width}x{game.height}, larger than the "
+                    f"{self.width}x{self.height} screen; it will be cropped")
+        game.set_origin(max(0, (self.width - game.width) // 2),
+                max(0, (self.height - game.height) // 2))
+        game.init()
+        self.time(f"start {spec.title}", start)
+
+        return game
+
+    def select(self, index: int) -> None:
+        start = perf_counter()
+        if index not in self.games:
+            self.games[index] = self.load(index)
+        game = self.games[index]
+        self.pyxel.camera()
+        self.pyxel.cls(0)
+        game.request_redraw()
+        self.active = game
+        self.pyxel.title(GAMES[index].title)
+        self.time(f"switch to {GAMES[index].title}", start)
+
+    def update(self) -> None:
+        for index, key in enumerate(self.switch_keys):
+            if self.pyxel.btnp(key) and self.games.get(index) is not self.active:
+                self.select(index)
+
+        if self.active is not None:
+            self.active._update()  # pyright: ignore[reportPrivateUsage]
+
+    def draw(self) -> None:
+        if self.active is not None:
+            self.active._draw()  # pyright: ignore[reportPrivateUsage]
+
+    def report(self) -> None:
+        log("startup timings:")
+        for label, elapsed in self.timings:
+            log(f"  {label:<40}{elapsed * 1000:>10.1f} ms")
+
+
+def main():
+    parser = ArgumentParser(description="Run all the example games in a single window.")
+
+    parser.add_argument('--game', type=int, default=1, choices=range(1, len(GAMES) + 1),
+            help="the game to start with (1 to 7, like F1 to F7)")
+    parser.add_argument('--width', type=int, default=WIDTH)
+    parser.add_argument('--height', type=int, default=HEIGHT)
+
+    args = parser.parse_args()
+
+    start = perf_counter()
+    launcher = Launcher(args.width, args.height)
+    launcher.time("import pyxel and pyxelgrid", start)
+    atexit.register(launcher.report)
+
+    start = perf_counter()
+    launcher.pyxel.init(args.width, args.height, title=TITLE, fps=FPS)
+    launcher.time("pyxel.init", start)
+
+    launcher.select(args.game - 1)
+    launcher.pyxel.run(launcher.update, launcher.draw)
+
+
+if __name__ == '__main__':
+    main()
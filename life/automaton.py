@@ -0,0 +1,344 @@
+# pyright: strict
+
+"""A double-buffered cellular automaton engine on bitboards, independent of pyxel.
+
+Cells have states `0` to `states - 1`, and every cell's next state depends only on its current
+state and on how many of its eight neighbors are in state `1` ("alive"). A `Rule` is a table of
+the next state for every (state, count) pair, so Life, Brian's Brain and the like are just
+different tables; `Rule.parse` builds them from the usual "B3/S23" notation.
+
+The board is stored as one bitboard per nonzero state, split into horizontal bands of
+`BAND_ROWS` rows: bit `i*(c+1) + j` of a band's int is the cell at row `i` of the band and
+column `j`. Column `c` is a guard column that's always zero, so shifting a bitboard left or right
+by one never wraps a cell into the next row. A step computes the neighbor counts of a whole band
+at once with bitwise adders, as four bitboards holding the bits of the counts, and then looks up
+the rule with a few more bitwise operations; nothing is done per cell.
+
+Bands whose cells didn't change, and whose neighboring bands didn't change either, are skipped,
+since they'd come out the same. Stable or empty areas of the board thus cost (almost) nothing.
+
+Cells outside the board are dead.
+"""
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from random import Random
+from typing import Final
+
+
+BAND_ROWS: Final[int] = 16
+NEIGHBORS: Final[int] = 8
+DENSITY_BITS: Final[int] = 8
+DENSITY_LEVELS: Final[int] = 1 << DENSITY_BITS
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    table: tuple[tuple[int, ...], ...]  # table[state][count] = next state
+
+    def __post_init__(self) -> None:
+        if not len(self.table) >= 2:
+            raise ValueError(f"A rule needs at least two states; got {len(self.table)}")
+        for state, row in enumerate(self.table):
+            if len(row) != NEIGHBORS + 1:
+                raise ValueError(f"State {state} needs {NEIGHBORS + 1} entries; got {len(row)}")
+            if not all(0 <= nxt < len(self.table) for nxt in row):
+                raise ValueError(f"State {state} has an invalid next state: {row}")
+
+    @property
+    def states(self) -> int:
+        return len(self.table)
+
+    @staticmethod
+    def parse(rule: str, name: str | None = None) -> 'Rule':
+        """Parses a rule in "B/S" notation, optionally followed by "/C" and a number of states.
+
+        E.g., "B3/S23" is Life: a dead cell with 3 alive neighbors is born, and an alive cell
+        with 2 or 3 alive neighbors survives. With `/Cn` (a "Generations" rule), an alive cell
+        that doesn't survive goes through the dying states `2` to `n - 1` before it's dead, one
+        per step; e.g., "B2/S/C3" is Brian's Brain.
+        """
+        parts = rule.upper().split('/')
+        if len(parts) not in (2, 3) or not parts[0].startswith('B') or not parts[1].startswith('S'):
+            raise ValueError(f"Invalid rule: {rule!r}")
+        try:
+            born = {int(d) for d in parts[0][1:]}
+            survive = {int(d) for d in parts[1][1:]}
+            states = int(parts[2][1:]) if len(parts) == 3 and parts[2].startswith('C') else 2
+        except ValueError:
+            raise ValueError(f"Invalid rule: {rule!r}") from None
+        if len(parts) == 3 and not parts[2].startswith('C'):
+            raise ValueError(f"Invalid rule: {rule!r}")
+
+        dying = 2 if states > 2 else 0
+        table = [
+            tuple(1 if k in born else 0 for k in range(NEIGHBORS + 1)),
+            tuple(1 if k in survive else dying for k in range(NEIGHBORS + 1)),
+        ]
+        for state in range(2, states):
+            table.append((state + 1 if state + 1 < states else 0,) * (NEIGHBORS + 1))
+        return Rule(name if name is not None else rule.upper(), tuple(table))
+
+
+RULES: Final[dict[str, Rule]] = {
+    rule.name: rule for rule in (
+        Rule.parse("B3/S23", "Life"),
+        Rule.parse("B36/S23", "HighLife"),
+        Rule.parse("B2/S", "Seeds"),
+        Rule.parse("B3678/S34678", "Day & Night"),
+        Rule.parse("B2/S/C3", "Brian's Brain"),
+    )
+}
+
+
+def _plan(rule: Rule) -> list[list[tuple[int, tuple[int, ...] | None]]]:
+    # for each next state t >= 1, the states s that lead to it, and with which neighbor counts
+    # (`None` if with any count)
+    plan: list[list[tuple[int, tuple[int, ...] | None]]] = [[] for _ in range(rule.states)]
+    for state, row in enumerate(rule.table):
+        for nxt in range(1, rule.states):
+            counts = tuple(k for k, t in enumerate(row) if t == nxt)
+            if len(counts) == NEIGHBORS + 1:
+                plan[nxt].append((state, None))
+            elif counts:
+                plan[nxt].append((state, counts))
+    return plan
+
+
+class Automaton:
+    """An `r` by `c` board stepped according to `rule`."""
+
+    def __init__(self, r: int, c: int, rule: Rule, *, band_rows: int = BAND_ROWS) -> None:
+        if not r > 0: raise ValueError(f"r must be positive; got {r=}")
+        if not c > 0: raise ValueError(f"c must be positive; got {c=}")
+        if not band_rows > 0: raise ValueError(f"band_rows must be positive; got {band_rows=}")
+        self.r = r
+        self.c = c
+        self.w = c + 1  # with the guard column
+        self.band_rows = band_rows
+        self.bands = (r + band_rows - 1) // band_rows
+        self.generation = 0
+
+        self._rows = [min(band_rows, r - b * band_rows) for b in range(self.bands)]
+        row_mask = (1 << c) - 1
+        self._masks = [sum(row_mask << i * self.w for i in range(rows)) for rows in self._rows]
+        self._ext_masks = [sum(row_mask << i * self.w for i in range(rows + 2))
+                for rows in self._rows]
+        self._row_mask = row_mask
+
+        self._rule = rule
+        self._plan = _plan(rule)
+        # the current and the next boards; _planes[s - 1][b] is band b of the bitboard of state s
+        self._planes = self._empty()
+        self._next = self._empty()
+        self._changed = [True] * self.bands
+        self._dirty: set[int] = set(range(self.bands))
+        super().__init__()
+
+    def _empty(self) -> list[list[int]]:
+        return [[0] * self.bands for _ in range(1, self._rule.states)]
+
+    @property
+    def rule(self) -> Rule:
+        return self._rule
+
+    def set_rule(self, rule: Rule) -> None:
+        """Changes the rule; cells in states that the new rule doesn't have are cleared."""
+        planes = self._empty()
+        for s in range(1, min(rule.states, self._rule.states)):
+            planes[s - 1] = self._planes[s - 1]
+        self._rule = rule
+        self._plan = _plan(rule)
+        self._planes = planes
+        self._next = self._empty()
+        self._touch_all()
+
+    @property
+    def active_bands(self) -> int:
+        """The number of bands that the next step has to compute."""
+        changed = self._changed
+        return sum(changed[b]
+                or (b > 0 and changed[b - 1])
+                or (b + 1 < self.bands and changed[b + 1]) for b in range(self.bands))
+
+    @property
+    def population(self) -> int:
+        """The number of cells that aren't dead (in state `0`)."""
+        return sum(band.bit_count() for plane in self._planes for band in plane)
+
+    def __getitem__(self, ij: tuple[int, int]) -> int:
+        b, bit = self._locate(*ij)
+        for s, plane in enumerate(self._planes, 1):
+            if plane[b] >> bit & 1:
+                return s
+        return 0
+
+    def __setitem__(self, ij: tuple[int, int], state: int) -> None:
+        if not 0 <= state < self._rule.states:
+            raise ValueError(f"Invalid state {state} for {self._rule.name}")
+        b, bit = self._locate(*ij)
+        for s, plane in enumerate(self._planes, 1):
+            if s == state:
+                plane[b] |= 1 << bit
+            else:
+                plane[b] &= ~(1 << bit)
+        self._touch(b)
+
+    def _locate(self, i: int, j: int) -> tuple[int, int]:
+        if not (0 <= i < self.r and 0 <= j < self.c):
+            raise IndexError(f"Cell ({i}, {j}) is out of bounds")
+        b, i = divmod(i, self.band_rows)
+        return b, i * self.w + j
+
+    def _touch(self, b: int) -> None:
+        self._changed[b] = True
+        self._dirty.add(b)
+
+    def _touch_all(self) -> None:
+        self._changed = [True] * self.bands
+        self._dirty.update(range(self.bands))
+
+    def clear(self) -> None:
+        self._planes = self._empty()
+        self.generation = 0
+        self._touch_all()
+
+    def randomize(self, rand: Random, density: float = 0.5) -> None:
+        """Sets every cell to alive with probability `density` (to within 1/256), and to dead
+        otherwise."""
+        self.clear()
+        # each bit of the density, from the least significant, either ORs or ANDs in a fresh
+        # random bitboard, which makes each cell alive with exactly that probability
+        level = round(min(max(density, 0.0), 1.0) * DENSITY_LEVELS)
+        alive = self._planes[0]
+        for b, rows in enumerate(self._rows):
+            if level == DENSITY_LEVELS:
+                alive[b] = self._masks[b]
+                continue
+            band = 0
+            for bit in range(DENSITY_BITS):
+                if level >> bit & 1:
+                    band |= rand.getrandbits(rows * self.w)
+                else:
+                    band &= rand.getrandbits(rows * self.w)
+            alive[b] = band & self._masks[b]
+
+    def take_dirty(self) -> set[int]:
+        """Returns the bands that changed since the last call, e.g., to redraw only those."""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def band_codes(self, b: int) -> Iterator[str]:
+        """Yields the rows of band `b`, as strings with a hexadecimal digit (the state) per cell."""
+        w = self.w
+        rows = self._rows[b]
+        if len(self._planes) == 1:
+            codes = format(self._planes[0][b], f'0{rows * w}b')[::-1]
+        else:
+            # reading a binary numeral as hexadecimal moves each bit into its own digit
+            digits = sum(s * int(format(plane[b], 'b'), 16)
+                    for s, plane in enumerate(self._planes, 1))
+            codes = format(digits, f'0{rows * w}x')[::-1]
+        for i in range(rows):
+            yield codes[i * w:i * w + self.c]
+
+    def step(self) -> None:
+        """Advances the board by one generation."""
+        planes = self._planes
+        nxt = self._next
+        changed = self._changed
+        new_changed = [False] * self.bands
+        last = self.bands - 1
+
+        for b in range(self.bands):
+            if not (changed[b] or (b > 0 and changed[b - 1]) or (b < last and changed[b + 1])):
+                for plane, next_plane in zip(planes, nxt):
+                    next_plane[b] = plane[b]
+                continue
+
+            self._step_band(b)
+            if any(plane[b] != next_plane[b] for plane, next_plane in zip(planes, nxt)):
+                new_changed[b] = True
+                self._dirty.add(b)
+
+        self._planes, self._next = nxt, planes
+        self._changed = new_changed
+        self.generation += 1
+
+    def _step_band(self, b: int) -> None:
+        w = self.w
+        rows = self._rows[b]
+        alive = self._planes[0]
+
+        # the band, with the last row of the band above and the first row of the band below
+        ext = alive[b] << w
+        if b > 0:
+            ext |= alive[b - 1] >> (self._rows[b - 1] - 1) * w
+        if b + 1 < self.bands:
+            ext |= (alive[b + 1] & self._row_mask) << (rows + 1) * w
+        full = self._ext_masks[b]
+
+        # alive cells to the left and to the right of each cell
+        lft = ext << 1 & full
+        rgt = ext >> 1 & full
+
+        # alive cells in each row of three centered on each cell (two bits), and in the two
+        # cells beside each cell (two bits)
+        x = lft ^ rgt
+        row0 = x ^ ext
+        row1 = lft & rgt | x & ext
+        side0 = x
+        side1 = lft & rgt
+
+        # the rows of three above and below: 2 bits + 2 bits = 3 bits
+        up0, up1 = row0 << w, row1 << w
+        dn0, dn1 = row0 >> w, row1 >> w
+        x = up1 ^ dn1
+        carry = up0 & dn0
+        sum0 = up0 ^ dn0
+        sum1 = x ^ carry
+        sum2 = up1 & dn1 | carry & x
+
+        # plus the two beside: 3 bits + 2 bits = 4 bits
+        x = sum1 ^ side1
+        carry = sum0 & side0
+        n0 = sum0 ^ side0
+        n1 = x ^ carry
+        carry = sum1 & side1 | carry & x
+        n2 = sum2 ^ carry
+        n3 = sum2 & carry
+
+        bits = (n0, n1, n2, n3)
+        inverted = (n0 ^ full, n1 ^ full, n2 ^ full, n3 ^ full)
+        counts: dict[int, int] = {}
+
+        def count(k: int) -> int:
+            if k not in counts:
+                eq = full
+                for bit in range(4):
+                    eq &= bits[bit] if k >> bit & 1 else inverted[bit]
+                counts[k] = eq
+            return counts[k]
+
+        # the cells of the band in each state, aligned with the counts
+        mask = self._masks[b]
+        states = [0] + [plane[b] << w for plane in self._planes]
+        occupied = 0
+        for band in states:
+            occupied |= band
+        states[0] = occupied ^ mask << w
+
+        for t, sources in enumerate(self._plan):
+            if t == 0:
+                continue
+            result = 0
+            for s, ks in sources:
+                if ks is None:
+                    result |= states[s]
+                else:
+                    matches = 0
+                    for k in ks:
+                        matches |= count(k)
+                    result |= states[s] & matches
+            self._next[t - 1][b] = result >> w & mask
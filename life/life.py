@@ -0,0 +1,190 @@
+# pyright: strict
+
+"""Cellular automata (Life, Brian's Brain, and others) on top of `PyxelGrid`.
+
+The board is stepped by `automaton.Automaton`. Rather than drawing cells one by one, the game
+keeps an image of the board, redraws only the bands of rows that changed since the last frame
+into it, and draws the image in one go.
+
+.. highlight:: bash
+.. code-block:: bash
+
+    python life.py -r 1024 -c 1024 --dim 1 --rule "Brian's Brain" --stats
+    python life.py --rule B36/S23
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from typing import Final
+
+import pyxel
+
+import pyxelgrid as pg
+from automaton import RULES, Automaton, Rule
+
+
+TITLE: Final[str] = "Life"
+FPS: Final[int] = 60
+R: Final[int] = 128
+C: Final[int] = 128
+DIM: Final[int] = 4
+HEAD: Final[int] = 20
+DENSITY: Final[float] = 0.3
+MAX_STEPS: Final[int] = 16
+
+# the color of each state, as a hexadecimal digit
+STATE_COLORS: Final[str] = "0bc51d"
+COLOR_TEXT: Final[int] = 7
+
+
+class LifeGame(pg.PyxelGrid[int]):
+    def __init__(self, r: int = R, c: int = C, dim: int = DIM, *, rule: Rule = RULES["Life"],
+            density: float = DENSITY, steps: int = 1, seed: int | None = None) -> None:
+        if not len(STATE_COLORS) >= rule.states:
+            raise ValueError(f"At most {len(STATE_COLORS)} states are supported; "
+                    f"{rule.name} has {rule.states}")
+        self.automaton = Automaton(r, c, rule)
+        self.density = density
+        self.steps = steps
+        self.running = True
+        self.rand = Random(seed)
+        super().__init__(r, c, dim=dim, y_u=HEAD, skip_idle_frames=True)
+
+        # each cell is drawn as a `dim` by `dim` square of its state's color
+        self._colors = str.maketrans({f'{s:x}': color * dim
+                for s, color in enumerate(STATE_COLORS)})
+        self._image: pyxel.Image | None = None
+
+
+    @property
+    def animating(self) -> bool:
+        return self.running
+
+
+    def __getitem__(self, ij: tuple[int, int]) -> int:
+        i, j = ij
+        self.check_in_bounds(i, j)
+        return self.automaton[i, j]
+
+
+    def __setitem__(self, ij: tuple[int, int], state: int) -> None:
+        i, j = ij
+        self.check_in_bounds(i, j)
+        self.automaton[i, j] = state
+        self.request_redraw()
+
+
+    def init(self) -> None:
+        pyxel.mouse(True)  # show mouse
+
+        self._image = pyxel.Image(self.c * self.dim, self.r * self.dim)
+        self.automaton.randomize(self.rand, self.density)
+
+
+    def update(self) -> None:
+
+        # SPACE = run/pause, S = single step (while paused)
+        if pyxel.btnp(pyxel.KEY_SPACE):
+            self.running = not self.running
+            self.request_redraw()
+        if self.running:
+            for _ in range(self.steps):
+                self.automaton.step()
+        elif pyxel.btnp(pyxel.KEY_S, hold=15, repeat=2):
+            self.automaton.step()
+            self.request_redraw()
+
+        # UP/DOWN = more/fewer steps per frame
+        if pyxel.btnp(pyxel.KEY_UP):
+            self.steps = min(MAX_STEPS, self.steps + 1)
+        if pyxel.btnp(pyxel.KEY_DOWN):
+            self.steps = max(1, self.steps - 1)
+
+        # R = randomize, C = clear, N = next rule
+        if pyxel.btnp(pyxel.KEY_R):
+            self.automaton.randomize(self.rand, self.density)
+        if pyxel.btnp(pyxel.KEY_C):
+            self.automaton.clear()
+        if pyxel.btnp(pyxel.KEY_N):
+            self.next_rule()
+
+        # left mouse = draw alive cells, right mouse = erase
+        i, j = self.mouse_cell()
+        if self.in_bounds(i, j):
+            if pyxel.btn(pyxel.MOUSE_BUTTON_LEFT):
+                self[i, j] = 1
+            elif pyxel.btn(pyxel.MOUSE_BUTTON_RIGHT):
+                self[i, j] = 0
+
+
+    def next_rule(self) -> None:
+        rules = [rule for rule in RULES.values() if rule.states <= len(STATE_COLORS)]
+        current = self.automaton.rule
+        index = rules.index(current) if current in rules else -1
+        self.automaton.set_rule(rules[(index + 1) % len(rules)])
+        self.request_redraw()
+
+
+    def refresh_image(self) -> None:
+        """Redraws the bands of the board that changed since the last call into the image."""
+        assert self._image is not None
+        dim = self.dim
+        band_height = self.automaton.band_rows * dim
+        for b in self.automaton.take_dirty():
+            rows: list[str] = []
+            for codes in self.automaton.band_codes(b):
+                rows.extend([codes.translate(self._colors)] * dim)
+            self._image.set(0, b * band_height, rows)
+
+
+    def pre_draw_grid(self) -> None:
+        # background color
+        pyxel.cls(0)
+
+        # the cells are drawn all at once from the image, instead of with `draw_cell`
+        self.refresh_image()
+        assert self._image is not None
+        pyxel.blt(self.x(0), self.y(0), self._image, 0, 0, self.c * self.dim, self.r * self.dim)
+
+
+    def post_draw_grid(self) -> None:
+        automaton = self.automaton
+        state = "RUNNING" if self.running else "PAUSED"
+        pyxel.text(2, 2, f"{automaton.rule.name.upper()}  GEN {automaton.generation}  "
+                f"POP {automaton.population}  ACTIVE {automaton.active_bands}/{automaton.bands}"
+                f"  x{self.steps}  {state}", COLOR_TEXT)
+        pyxel.text(2, 11, "CONTROLS: SPACE, S, UP/DOWN, R, C, N, MOUSE", 3)
+
+
+def parse_rule(rule: str) -> Rule:
+    if rule in RULES:
+        return RULES[rule]
+    return Rule.parse(rule)
+
+
+def main():
+    parser = ArgumentParser()
+
+    parser.add_argument('-r', type=int, default=R)
+    parser.add_argument('-c', type=int, default=C)
+    parser.add_argument('--dim', type=int, default=DIM)
+    parser.add_argument('--rule', type=parse_rule, default=RULES["Life"],
+            help=f"one of {', '.join(map(repr, RULES))}, or a rule like B3/S23 or B2/S/C3")
+    parser.add_argument('--density', type=float, default=DENSITY,
+            help="the fraction of cells that start alive")
+    parser.add_argument('--steps', type=int, default=1, help="steps per frame")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--stats', action='store_true',
+            help="print the frame rate and update/draw timings on exit")
+
+    args = parser.parse_args()
+
+    game = LifeGame(args.r, args.c, args.dim, rule=args.rule, density=args.density,
+            steps=args.steps, seed=args.seed)
+    if args.stats:
+        game.enable_frame_stats()
+    game.run(title=TITLE, fps=FPS)
+
+
+if __name__ == '__main__':
+    main()
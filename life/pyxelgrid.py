@@ -0,0 +1 @@
+../pyxelgrid.py
\ No newline at end of file
@@ -0,0 +1,63 @@
+# pyright: strict
+
+from random import Random
+
+import pytest
+
+from automaton import RULES, Automaton, Rule
+
+
+def naive_step(cells: list[list[int]], rule: Rule) -> list[list[int]]:
+    # one generation, cell by cell
+    r, c = len(cells), len(cells[0])
+    nxt = [[0] * c for _ in range(r)]
+    for i in range(r):
+        for j in range(c):
+            alive = sum(cells[ni][nj] == 1
+                    for ni in range(max(i - 1, 0), min(i + 2, r))
+                    for nj in range(max(j - 1, 0), min(j + 2, c))
+                    if (ni, nj) != (i, j))
+            nxt[i][j] = rule.table[cells[i][j]][alive]
+    return nxt
+
+
+def cells_of(automaton: Automaton) -> list[list[int]]:
+    return [[automaton[i, j] for j in range(automaton.c)] for i in range(automaton.r)]
+
+
+@pytest.mark.parametrize('name', [*RULES])
+@pytest.mark.parametrize('r, c, band_rows', [(1, 1, 16), (7, 9, 16), (23, 17, 4), (12, 30, 1)])
+def test_step_matches_naive(name: str, r: int, c: int, band_rows: int) -> None:
+    rule = RULES[name]
+    rand = Random(f'{name} {r} {c}')
+    automaton = Automaton(r, c, rule, band_rows=band_rows)
+    cells = [[rand.randrange(rule.states) for _ in range(c)] for _ in range(r)]
+    for i in range(r):
+        for j in range(c):
+            automaton[i, j] = cells[i][j]
+
+    for _ in range(30):
+        cells = naive_step(cells, rule)
+        automaton.step()
+        assert cells_of(automaton) == cells
+        assert automaton.population == sum(state != 0 for row in cells for state in row)
+
+
+def test_skipped_bands_wake_up() -> None:
+    # a glider crossing from a settled band into an empty one
+    automaton = Automaton(12, 12, RULES['Life'], band_rows=3)
+    for i, j in ((0, 1), (1, 2), (2, 0), (2, 1), (2, 2)):
+        automaton[i, j] = 1
+    cells = cells_of(automaton)
+    for _ in range(36):
+        cells = naive_step(cells, automaton.rule)
+        automaton.step()
+        assert cells_of(automaton) == cells
+
+
+def test_band_codes() -> None:
+    automaton = Automaton(5, 3, RULES["Brian's Brain"], band_rows=2)
+    automaton[0, 1] = 1
+    automaton[3, 2] = 2
+    assert [code for b in range(automaton.bands) for code in automaton.band_codes(b)] == [
+        '010', '000', '000', '002', '000']
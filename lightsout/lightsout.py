@@ -1,6 +1,8 @@
 # pyright: strict
 
 from argparse import ArgumentParser
+from collections.abc import Sequence
+from functools import partial
 from math import cos, sin
 from random import Random
 from typing import Final
@@ -8,22 +10,77 @@ from typing import Final
 import pyxel
 
 import pyxelgrid as pg
+from lightsout_puzzles import Puzzle, default_min_presses, generate_puzzle, load_pack
+from lightsout_solver import pack, solve, spread, unpack
 
 
 TITLE: Final[str] = "Lights Out"
 DEFAULT_N: Final[int] = 8
 DEFAULT_DIM: Final[int] = 40
+HINT_COLOR: Final[int] = 8
+MAX_SOLUTIONS: Final[int] = 1000  # the number of boards whose solutions are remembered
 
 
 class LightsOutGame(pg.PyxelGrid[bool]):
-    def __init__(self, n: int) -> None:
+    """Lights Out on an `n` by `n` board.
+
+    The board is stored as one bitmask per row (bit `j` of row `i` is cell `(i, j)`) along with
+    the number of lit cells, instead of in the grid's per-cell states. Indexing the game still
+    works as usual.
+
+    New games are randomly generated puzzles needing at least `min_presses` presses, or if
+    `puzzles` is given, the puzzles of a puzzle pack in order. Puzzles are generated in the
+    background, since that can take seconds on large boards.
+
+    Undo and redo are only enabled by `init()`, for the interactive game; otherwise, a move is just
+    three XORs, with no per-cell bookkeeping.
+    """
+
+    def __init__(self, n: int, *, min_presses: int | None = None,
+            puzzles: Sequence[Puzzle] = ()) -> None:
         self.win = False
+        self.generating = False
+        self.show_hint = False
+        self._hint: list[int] | None = None
+        self._hint_stale = True
+        self._hint_task: pg.Task[list[int] | None] | None = None
+        self._solutions: dict[int, list[int] | None] = {}  # by the boards' _board_key()
         self.rand = Random()
-        super().__init__(n, n, dim=DEFAULT_DIM)
+        self.min_presses = default_min_presses(n, n) if min_presses is None else min_presses
+        self.puzzles = puzzles
+        self._next_puzzle = 0
+        super().__init__(n, n, dim=DEFAULT_DIM, layerc=1, skip_idle_frames=True)
+
+        self._rows = [0] * self.r
+        self._lit = 0
+
+        # pressing a cell in column j toggles these cells in its own row, and just column j in
+        # the rows above and below
+        self._press_masks = [spread(1 << j, self.c) for j in range(self.c)]
+
+
+    @property
+    def animating(self) -> bool:
+        # the "YOU WIN!!" text moves around
+        return self.win
+
+
+    def __getitem__(self, ij: tuple[int, int]) -> bool:
+        i, j = ij
+        self.check_in_bounds(i, j)
+        return bool(self._rows[i] >> j & 1)
+
+
+    def __setitem__(self, ij: tuple[int, int], state: bool) -> None:
+        i, j = ij
+        self.check_in_bounds(i, j)
+        if self[i, j] != state:
+            self._toggle(i, 1 << j)
 
 
     def init(self) -> None:
         pyxel.mouse(True)  # show mouse
+        self.enable_journal()
 
         self.new_game()
 
@@ -34,6 +91,19 @@ class LightsOutGame(pg.PyxelGrid[bool]):
         if pyxel.btnp(pyxel.KEY_N):
             self.new_game()
 
+        # H = toggle hint
+        if pyxel.btnp(pyxel.KEY_H):
+            self.show_hint = not self.show_hint
+
+        if self.generating:
+            return
+
+        # Z = undo, Y = redo
+        if pyxel.btnp(pyxel.KEY_Z) and self.undo():
+            self.win = False
+        if pyxel.btnp(pyxel.KEY_Y) and self.redo():
+            self.win = False
+
         if not self.win:
             if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
                 im, jm = self.mouse_cell()
@@ -45,43 +115,129 @@ class LightsOutGame(pg.PyxelGrid[bool]):
 
     def check_win(self) -> None:
         if not self.win:
-            if all(not self[i, j] for i in range(self.r) for j in range(self.c)):
+            if not self._lit:
                 self.win = True
 
 
     def new_game(self) -> None:
         self.win = False
+        self.cancel_tasks()
+        self._hint_task = None
+
+        if self.puzzles:
+            puzzle = self.puzzles[self._next_puzzle % len(self.puzzles)]
+            self._next_puzzle += 1
+            self.start_puzzle(puzzle)
+        else:
+            # the current board stays up (frozen) while the next puzzle is generated
+            self.generating = True
+            self.request_redraw()
+            self.submit(generate_puzzle, self.r, self.c, self.min_presses,
+                    self.rand.getrandbits(64), callback=self.start_puzzle, process=True)
+
+
+    def start_puzzle(self, puzzle: Puzzle) -> None:
+        self.win = False
+        self.generating = False
 
-        # clear grid
-        for i in range(self.r):
-            for j in range(self.c):
-                self[i, j] = False
+        # only the cells that differ are toggled, so the changes are tracked like any other,
+        # except for undo, whose history starts over
+        with self.unrecorded():
+            for i, row in enumerate(unpack(puzzle.board, self.r, self.c)):
+                self._toggle(i, self._rows[i] ^ row)
+        self.request_redraw()
+        self.clear_journal()
 
-        # randomize
-        for i in range(self.r):
-            for j in range(self.c):
-                if self.rand.randrange(2):
-                    self.move(i, j)
+        # the puzzle comes with a minimum-press solution, so there's nothing to solve
+        self._hint = unpack(puzzle.presses, self.r, self.c)
+        self._hint_stale = False
+        self._remember_solution(self._board_key(), self._hint)
 
 
     def move(self, i: int, j: int) -> None:
         if not self.in_bounds(i, j):
             raise ValueError("Cannot move out of bounds")
-        for di, dj in (0, 0), (0, +1), (0, -1), (+1, 0), (-1, 0):
-            if self.in_bounds(ni := i + di, nj := j + dj):
-                self.flip(ni, nj)
+        with self.transaction():
+            self._toggle(i, self._press_masks[j])
+            if i > 0:
+                self._toggle(i - 1, 1 << j)
+            if i < self.r - 1:
+                self._toggle(i + 1, 1 << j)
 
 
     def flip(self, i: int, j: int) -> None:
         self[i, j] = not self[i, j]
 
 
+    def _toggle(self, i: int, mask: int) -> None:
+        row = self._rows[i]
+        if self._tracking:
+            bits = mask
+            while bits:
+                j = (bits & -bits).bit_length() - 1
+                self._changed((i, j), bool(row >> j & 1), not row >> j & 1)
+                bits &= bits - 1
+        self._lit += (mask & ~row).bit_count() - (mask & row).bit_count()
+        self._rows[i] = row ^ mask
+        self._hint_stale = True
+        self.request_redraw()
+
+
+    def hint(self) -> list[int] | None:
+        """Returns a minimum-press solution of the current board, as row bitmasks.
+
+        Returns `None` if the board can't be solved, or while the solution is being computed.
+        The solution is only recomputed (in the background) after the board changes, so this is
+        cheap to call every frame. The solutions of recent boards are remembered, so going back to
+        one (e.g., via undo) gives its hint right away.
+        """
+        if self._hint_stale:
+            if self._hint_task is not None:
+                self._hint_task.cancel()
+                self._hint_task = None
+            key = self._board_key()
+            if key in self._solutions:
+                self._hint = self._solutions[key]
+            else:
+                self._hint = None
+                self._hint_task = self.submit(solve, [*self._rows], self.c,
+                        callback=partial(self._set_hint, key))
+            self._hint_stale = False
+        return self._hint
+
+
+    def _board_key(self) -> int:
+        # the whole board packed into one int, which identifies it exactly
+        return pack(self._rows, self.c)
+
+
+    def _set_hint(self, key: int, hint: list[int] | None) -> None:
+        self._remember_solution(key, hint)
+        self._hint = hint
+        self._hint_task = None
+        self.request_redraw()
+
+
+    def _remember_solution(self, key: int, solution: list[int] | None) -> None:
+        if len(self._solutions) >= MAX_SOLUTIONS:
+            del self._solutions[next(iter(self._solutions))]
+        self._solutions[key] = solution
+
+
+    def fill_cell(self, i: int, j: int) -> int | None:
+        # lit lights are filled whole; the margin around them is cleared by draw_gaps
+        return 6 if self[i, j] else None
+
+
     def draw_cell(self, i: int, j: int, x: int, y: int) -> None:
-        # draw light
-        if self[i, j]:
-            pyxel.rect(x + 1, y + 1, self.dim - 2, self.dim - 2, 6)
-        else:
-            pyxel.rectb(x + 1, y + 1, self.dim - 2, self.dim - 2, 1)
+        # draw unlit light
+        pyxel.rectb(x + 1, y + 1, self.dim - 2, self.dim - 2, 1)
+
+
+    def draw_cell_layer(self, i: int, j: int, x: int, y: int, layeri: int) -> None:
+        # draw hint
+        if self.show_hint and (hint := self.hint()) is not None and hint[i] >> j & 1:
+            pyxel.circ(x + self.dim / 2, y + self.dim / 2, self.dim / 6, HINT_COLOR)
 
 
     def pre_draw_grid(self) -> None:
@@ -89,22 +245,49 @@ class LightsOutGame(pg.PyxelGrid[bool]):
         pyxel.cls(0)
 
 
+    def draw_gaps(self) -> None:
+        # the 1-pixel margin around every light, as a line between each pair of rows and columns
+        for i in range(self.r + 1):
+            pyxel.rect(self.x(0), self.y(i) - 1, self.c * self.dim, 2, 0)
+        for j in range(self.c + 1):
+            pyxel.rect(self.x(j) - 1, self.y(0), 2, self.r * self.dim, 0)
+
+
     def post_draw_grid(self) -> None:
+        self.draw_gaps()
+
         if self.win:
             th = pyxel.frame_count / 14
             x = self.width / 2 * (1 + 0.4 * cos(th)) - 18
             y = self.height / 2 * (1 + 0.4 * sin(th))
             pyxel.text(x, y, "YOU WIN!!", 11)
+        elif self.generating:
+            pyxel.text(2, 2, "GENERATING...", 7)
 
 
 def main():
     parser = ArgumentParser()
 
     parser.add_argument('-n', type=int, default=DEFAULT_N)
+    parser.add_argument('--min-presses', type=int)
+    parser.add_argument('--pack')
+    parser.add_argument('--latency', action='store_true',
+            help="print the input-to-display latencies on exit")
 
     args = parser.parse_args()
 
-    LightsOutGame(args.n).run(title=TITLE)
+    n = args.n
+    puzzles: list[Puzzle] = []
+    if args.pack:
+        r, c, puzzles = load_pack(args.pack)
+        if r != c:
+            parser.error(f"{args.pack} has {r}x{c} puzzles; only square boards are supported")
+        n = r
+
+    game = LightsOutGame(n, min_presses=args.min_presses, puzzles=puzzles)
+    if args.latency:
+        game.enable_latency_stats()
+    game.run(title=TITLE)
 
 
 if __name__ == '__main__':
@@ -1,28 +1,64 @@
 # pyright: strict
 
 from argparse import ArgumentParser
+from collections.abc import Sequence
 from dataclasses import dataclass
-import random
+from functools import partial
+from random import Random
 
 import pyxel
 
 import pyxelgrid as pg
+from lightsout_puzzles import Puzzle, default_min_presses, generate_puzzle, load_pack
+from lightsout_solver import solve, unpack
 
 
 TITLE = "Lights Out!"
 DEFAULT_N = 8
 DEFAULT_DIM = 40
+HINT_COLOR = 8
+MAX_SOLUTIONS = 1000  # the number of boards whose solutions are remembered
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CellState:
     on: bool
 
+    @staticmethod
+    def of(on: bool) -> 'CellState':
+        """Returns the shared instance with the given field."""
+        return CELL_ON if on else CELL_OFF
+
+
+# states are immutable, so every cell shares one of these two instances
+CELL_ON = CellState(on=True)
+CELL_OFF = CellState(on=False)
+
 
 class LightsOutGame(pg.PyxelGrid[CellState]):
-    def __init__(self, n: int) -> None:
+    def __init__(self, n: int, *, min_presses: int | None = None,
+            puzzles: Sequence[Puzzle] = ()) -> None:
         self.win = False
-        super().__init__(n, n, dim=DEFAULT_DIM)
+        self.generating = False
+        self.show_hint = False
+        self._hint: list[int] | None = None
+        self._hint_stale = True
+        self._hint_task: pg.Task[list[int] | None] | None = None
+        self._solutions: dict[int, list[int] | None] = {}  # by the boards' state_hash()
+        self.rand = Random()
+        self.min_presses = default_min_presses(n, n) if min_presses is None else min_presses
+        self.puzzles = puzzles
+        self._next_puzzle = 0
+        super().__init__(n, n, dim=DEFAULT_DIM, layerc=1, skip_idle_frames=True)
+
+        # every light starts off, until the first puzzle is ready
+        for i in range(self.r):
+            for j in range(self.c):
+                self[i, j] = CELL_OFF
+
+        self.enable_journal()
+        self.enable_state_hash()
+        self.enable_region_sums(lambda state: state.on)  # the number of lit lights
 
 
     def init(self) -> None:
@@ -37,6 +73,21 @@ class LightsOutGame(pg.PyxelGrid[CellState]):
         if pyxel.btnp(pyxel.KEY_N):
             self.new_game()
 
+        # H = toggle hint
+        if pyxel.btnp(pyxel.KEY_H):
+            self.show_hint = not self.show_hint
+
+        if self.generating:
+            return
+
+        # Z = undo, Y = redo
+        if pyxel.btnp(pyxel.KEY_Z) and self.undo():
+            self.win = False
+            self._hint_stale = True
+        if pyxel.btnp(pyxel.KEY_Y) and self.redo():
+            self.win = False
+            self._hint_stale = True
+
         if not self.win:
             if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
                 im, jm = self.mouse_cell()
@@ -49,61 +100,164 @@ class LightsOutGame(pg.PyxelGrid[CellState]):
 
     def _check_win(self) -> None:
         if not self.win:
-            if all(not self[i, j].on for i in range(self.r) for j in range(self.c)):
+            if not self.region_sum(0, 0, self.r, self.c):
                 self.win = True
 
 
     def new_game(self) -> None:
         self.win = False
+        self.cancel_tasks()
+        self._hint_task = None
+
+        # generated puzzles are always solvable, with a known minimum-press solution
+        if self.puzzles:
+            puzzle = self.puzzles[self._next_puzzle % len(self.puzzles)]
+            self._next_puzzle += 1
+            self.start_puzzle(puzzle)
+        else:
+            # generating can take seconds on large boards, so it's done in the background while
+            # the current board stays up
+            self.generating = True
+            self.request_redraw()
+            self.submit(generate_puzzle, self.r, self.c, self.min_presses,
+                    self.rand.getrandbits(64), callback=self.start_puzzle, process=True)
 
-        # clear grid
-        for i in range(self.r):
-            for j in range(self.c):
-                self[i, j] = CellState(on=False)
 
-        # randomize
-        for i in range(self.r):
-            for j in range(self.c):
-                if random.randrange(2):
-                    # use move_on_cell instead of flip_cell so we're sure that the puzzle is solvable
-                    self.move_on_cell(i, j)
+    def start_puzzle(self, puzzle: Puzzle) -> None:
+        self.win = False
+        self.generating = False
+
+        # the history of undo starts over with the new board
+        rows = unpack(puzzle.board, self.r, self.c)
+        with self.unrecorded():
+            for i in range(self.r):
+                for j in range(self.c):
+                    self[i, j] = CellState.of(bool(rows[i] >> j & 1))
+
+        self._hint = unpack(puzzle.presses, self.r, self.c)
+        self._hint_stale = False
+        self._remember_solution(self.state_hash(), self._hint)
+        self.clear_journal()
+        self.request_redraw()
 
 
     def move_on_cell(self, i: int, j: int) -> None:
         if not self.in_bounds(i, j):
             raise ValueError("Cannot move out of bounds")
-        for di, dj in (0, 0), (0, +1), (0, -1), (+1, 0), (-1, 0):
-            if self.in_bounds(ni := i + di, nj := j + dj):
-                self.flip_cell(ni, nj)
+        with self.transaction():
+            for di, dj in (0, 0), (0, +1), (0, -1), (+1, 0), (-1, 0):
+                if self.in_bounds(ni := i + di, nj := j + dj):
+                    self.flip_cell(ni, nj)
 
 
     def flip_cell(self, i: int, j: int) -> None:
         if not self.in_bounds(i, j):
             raise ValueError("Cannot flip out of bounds")
-        self[i, j].on = not self[i, j].on
+        self[i, j] = CellState.of(not self[i, j].on)
+        self._hint_stale = True
+
+
+    def hint(self) -> list[int] | None:
+        """Returns a minimum-press solution of the current board, as row bitmasks.
+
+        Returns `None` if the board can't be solved, or while the solution is being computed.
+        The solution is only recomputed (in the background) after the board changes, so this is
+        cheap to call every frame. The solutions of recent boards are remembered, so going back to
+        one (e.g., via undo) gives its hint right away.
+        """
+        if self._hint_stale:
+            if self._hint_task is not None:
+                self._hint_task.cancel()
+                self._hint_task = None
+            key = self.state_hash()
+            if key in self._solutions:
+                self._hint = self._solutions[key]
+            else:
+                board = [sum(self[i, j].on << j for j in range(self.c)) for i in range(self.r)]
+                self._hint = None
+                self._hint_task = self.submit(solve, board, self.c,
+                        callback=partial(self._set_hint, key))
+            self._hint_stale = False
+        return self._hint
+
+
+    def _set_hint(self, key: int, hint: list[int] | None) -> None:
+        self._remember_solution(key, hint)
+        self._hint = hint
+        self._hint_task = None
+        self.request_redraw()
+
+
+    def _remember_solution(self, key: int, solution: list[int] | None) -> None:
+        if len(self._solutions) >= MAX_SOLUTIONS:
+            del self._solutions[next(iter(self._solutions))]
+        self._solutions[key] = solution
+
+
+    def fill_cell(self, i: int, j: int) -> int | None:
+        # lit lights are filled whole; the margin around them is cleared by draw_gaps
+        if self[i, j].on:
+            return 11 if (i, j) == self.mouse_cell() else 6
+        return None
 
 
     def draw_cell(self, i: int, j: int, x: int, y: int) -> None:
-        # draw light
-        if self[i, j].on:
-            pyxel.rect(x + 1, y + 1, self.dim - 2, self.dim - 2, 11 if (i, j) == self.mouse_cell() else 6)
-        else:
-            pyxel.rectb(x + 1, y + 1, self.dim - 2, self.dim - 2, 3 if (i, j) == self.mouse_cell() else 1)
+        # draw unlit light
+        pyxel.rectb(x + 1, y + 1, self.dim - 2, self.dim - 2, 3 if (i, j) == self.mouse_cell() else 1)
+
+
+    def draw_cell_layer(self, i: int, j: int, x: int, y: int, layeri: int) -> None:
+        # draw hint
+        if self.show_hint and (hint := self.hint()) is not None and hint[i] >> j & 1:
+            pyxel.circ(x + self.dim / 2, y + self.dim / 2, self.dim / 6, HINT_COLOR)
+
+
+    def background(self) -> int:
+        return 11 if self.win else 0
 
 
     def pre_draw_grid(self) -> None:
         # background color for the whole grid
-        pyxel.cls(11 if self.win else 0)
+        pyxel.cls(self.background())
+
+
+    def post_draw_grid(self) -> None:
+        self.draw_gaps()
+        if self.generating:
+            pyxel.text(2, 2, "GENERATING...", 7)
+
+
+    def draw_gaps(self) -> None:
+        # the 1-pixel margin around every light, as a line between each pair of rows and columns
+        for i in range(self.r + 1):
+            pyxel.rect(self.x(0), self.y(i) - 1, self.c * self.dim, 2, self.background())
+        for j in range(self.c + 1):
+            pyxel.rect(self.x(j) - 1, self.y(0), 2, self.r * self.dim, self.background())
 
 
 def main():
     parser = ArgumentParser()
 
     parser.add_argument('-n', type=int, default=DEFAULT_N)
+    parser.add_argument('--min-presses', type=int)
+    parser.add_argument('--pack')
+    parser.add_argument('--latency', action='store_true',
+            help="print the input-to-display latencies on exit")
 
     args = parser.parse_args()
 
-    LightsOutGame(args.n).run(title=TITLE)
+    n = args.n
+    puzzles: list[Puzzle] = []
+    if args.pack:
+        r, c, puzzles = load_pack(args.pack)
+        if r != c:
+            parser.error(f"{args.pack} has {r}x{c} puzzles; only square boards are supported")
+        n = r
+
+    game = LightsOutGame(n, min_presses=args.min_presses, puzzles=puzzles)
+    if args.latency:
+        game.enable_latency_stats()
+    game.run(title=TITLE)
 
 
 if __name__ == '__main__':
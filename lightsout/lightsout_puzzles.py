@@ -0,0 +1,226 @@
+# pyright: strict
+
+"""Generation of solvable Lights Out puzzles with a target minimum solution length.
+
+A puzzle is generated backwards: pick a random press pattern, canonicalize it into the pattern
+with the fewest presses among those that solve the same board (using the nullspace from
+`lightsout_solver`), and keep it if that many presses is within the requested range. The board is
+the XOR of the cells toggled by each press. Because the canonical pattern is a minimum-press
+solution, its length is exactly the puzzle's difficulty.
+
+That holds as long as the nullspace has at most `MAX_EXACT_NULLITY` basis vectors (e.g., for every
+square board up to 29x29, but not 30x30 or 32x32), since `minimize` is only exhaustive up to
+there. On other sizes the length is just an upper bound, so the pack generator refuses them.
+
+Boards and press patterns are packed into single ints, as in `lightsout_solver.pack`.
+
+Puzzles can also be generated in bulk and saved into a "puzzle pack", a text file that the games
+load with `--pack`, e.g.,
+
+.. highlight:: bash
+.. code-block:: bash
+
+    python lightsout_puzzles.py -n 8 --count 5000 --min-presses 20 -o pack8.txt
+    python lightsout.py --pack pack8.txt
+"""
+
+from argparse import ArgumentParser
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from random import Random
+from time import perf_counter
+from typing import Final
+
+from lightsout_solver import MAX_EXACT_NULLITY, minimize, nullspace, pack, spread
+
+
+DEFAULT_N: Final[int] = 8
+DEFAULT_COUNT: Final[int] = 1000
+MAX_ATTEMPTS: Final[int] = 10_000
+MAX_ATTEMPTS_PER_PUZZLE: Final[int] = 100
+PACK_HEADER: Final[str] = "# lights out puzzle pack"
+
+
+@dataclass(frozen=True)
+class Puzzle:
+    board: int
+    presses: int
+
+    @property
+    def length(self) -> int:
+        """The number of presses in the stored solution.
+
+        This is the minimum needed to solve the puzzle if it was generated on an `exact` board
+        size, and an upper bound otherwise.
+        """
+        return self.presses.bit_count()
+
+
+def default_min_presses(r: int, c: int) -> int:
+    return max(1, r * c // 4)
+
+
+@lru_cache(maxsize=None)
+def press_effects(r: int, c: int) -> tuple[int, ...]:
+    """Returns, for each cell `(i, j)` at index `i*c + j`, the packed board of lights that
+    pressing it toggles."""
+    effects: list[int] = []
+    for i in range(r):
+        for j in range(c):
+            rows = [0] * r
+            rows[i] = spread(1 << j, c)
+            if i > 0:
+                rows[i - 1] = 1 << j
+            if i < r - 1:
+                rows[i + 1] = 1 << j
+            effects.append(pack(rows, c))
+    return tuple(effects)
+
+
+def board_for(presses: int, r: int, c: int) -> int:
+    """Returns the packed board that the packed press pattern `presses` solves."""
+    effects = press_effects(r, c)
+    board = 0
+    while presses:
+        low = presses & -presses
+        board ^= effects[low.bit_length() - 1]
+        presses ^= low
+    return board
+
+
+class PuzzleGenerator:
+    def __init__(self, r: int, c: int, rand: Random | None = None) -> None:
+        if not r > 0: raise ValueError(f"r must be positive; got {r=}")
+        if not c > 0: raise ValueError(f"c must be positive; got {c=}")
+        self.r = r
+        self.c = c
+        self.rand = rand if rand is not None else Random()
+        self._nullspace = nullspace(r, c)
+        super().__init__()
+
+    @property
+    def exact(self) -> bool:
+        """Whether `canonical()` always finds a minimum-press pattern on this board size, i.e.,
+        whether generated puzzles' lengths are exact rather than upper bounds."""
+        return len(self._nullspace) <= MAX_EXACT_NULLITY
+
+    def canonical(self, presses: int) -> int:
+        """Returns the press pattern with the fewest presses that solves the same board as
+        `presses`, or, if the board size isn't `exact`, one with locally fewest presses."""
+        return minimize(presses, self._nullspace) if self._nullspace else presses
+
+    def generate(self, min_presses: int, max_presses: int | None = None) -> Puzzle:
+        """Generates a random puzzle whose minimum solution length is between `min_presses` and
+        `max_presses`, inclusive.
+
+        `max_presses` defaults to the number of cells. Raises a `ValueError` if no such puzzle
+        turns up after `MAX_ATTEMPTS` tries, e.g., if the range is impossible for this board size.
+        """
+        cells = self.r * self.c
+        lo = max(1, min_presses)
+        hi = min(cells, cells if max_presses is None else max_presses)
+        if lo > hi:
+            raise ValueError(f"Empty range of solution lengths: {min_presses}..{max_presses}")
+
+        for _ in range(MAX_ATTEMPTS):
+            presses = 0
+            for idx in self.rand.sample(range(cells), self.rand.randint(lo, hi)):
+                presses |= 1 << idx
+            presses = self.canonical(presses)
+            if lo <= presses.bit_count() <= hi:
+                return Puzzle(board_for(presses, self.r, self.c), presses)
+
+        raise ValueError(f"Could not generate a {self.r}x{self.c} puzzle with a solution length "
+                f"of {lo}..{hi}")
+
+    def generate_many(self, count: int, min_presses: int, max_presses: int | None = None, *,
+            unique: bool = True) -> list[Puzzle]:
+        """Generates `count` puzzles as with `generate`; if `unique`, no two share a board.
+
+        Raises a `ValueError` if fewer than `count` distinct puzzles turn up after
+        `MAX_ATTEMPTS_PER_PUZZLE * count` tries, e.g., if there aren't that many puzzles of the
+        requested lengths on this board size.
+        """
+        puzzles: list[Puzzle] = []
+        seen: set[int] = set()
+        for _ in range(MAX_ATTEMPTS_PER_PUZZLE * count):
+            if len(puzzles) >= count:
+                break
+            puzzle = self.generate(min_presses, max_presses)
+            if unique:
+                if puzzle.board in seen:
+                    continue
+                seen.add(puzzle.board)
+            puzzles.append(puzzle)
+
+        if len(puzzles) < count:
+            raise ValueError(f"Could only generate {len(puzzles)} of {count} distinct "
+                    f"{self.r}x{self.c} puzzles")
+        return puzzles
+
+
+def generate_puzzle(r: int, c: int, min_presses: int, seed: int) -> Puzzle:
+    """Generates a puzzle as with `PuzzleGenerator.generate`, from `seed`.
+
+    This takes a while on large boards, so the games run it in the background (e.g., via
+    `PyxelGrid.submit()`), which needs a picklable function rather than a generator.
+    """
+    return PuzzleGenerator(r, c, Random(seed)).generate(min_presses)
+
+
+def save_pack(filename: str, r: int, c: int, puzzles: Iterable[Puzzle]) -> None:
+    """Saves puzzles into a puzzle pack: a header, the board size, then one puzzle per line as
+    hexadecimal (packed) board and solution."""
+    with open(filename, 'w') as f:
+        f.write(f"{PACK_HEADER}\n{r} {c}\n")
+        f.writelines(f"{puzzle.board:x} {puzzle.presses:x}\n" for puzzle in puzzles)
+
+
+def load_pack(filename: str) -> tuple[int, int, list[Puzzle]]:
+    """Loads a puzzle pack saved by `save_pack`; returns the board size and the puzzles."""
+    with open(filename) as f:
+        if f.readline().rstrip('\n') != PACK_HEADER:
+            raise ValueError(f"{filename} is not a puzzle pack")
+        r, c = map(int, f.readline().split())
+        puzzles: list[Puzzle] = []
+        for line in f:
+            board, presses = line.split()
+            puzzles.append(Puzzle(int(board, 16), int(presses, 16)))
+    return r, c, puzzles
+
+
+def main():
+    parser = ArgumentParser(description="Generate a Lights Out puzzle pack.")
+
+    parser.add_argument('-n', type=int, default=DEFAULT_N)
+    parser.add_argument('--count', type=int, default=DEFAULT_COUNT)
+    parser.add_argument('--min-presses', type=int)
+    parser.add_argument('--max-presses', type=int)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('-o', '--output', required=True)
+
+    args = parser.parse_args()
+
+    min_presses = args.min_presses
+    if min_presses is None:
+        min_presses = default_min_presses(args.n, args.n)
+
+    generator = PuzzleGenerator(args.n, args.n, Random(args.seed))
+    if not generator.exact:
+        parser.error(f"Minimum solution lengths can't be guaranteed on {args.n}x{args.n} boards")
+
+    start = perf_counter()
+    try:
+        puzzles = generator.generate_many(args.count, min_presses, args.max_presses)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = perf_counter() - start
+    save_pack(args.output, args.n, args.n, puzzles)
+
+    print(f"generated {len(puzzles)} puzzles in {elapsed:.3f}s "
+            f"({len(puzzles) / max(elapsed, 1e-9):.0f} per second)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# pyright: strict
+
+"""A Lights Out solver over GF(2).
+
+Boards are given as a sequence of `r` row bitmasks, where bit `j` of row `i` is set if the light
+at cell `(i, j)` is on. Solutions ("press patterns") are returned in the same form: bit `j` of
+row `i` is set if cell `(i, j)` should be pressed.
+
+Solving uses light chasing. Once the presses in the top row are fixed, every other row of
+presses is forced: the presses in row `i + 1` must be exactly the lights still on in row `i`.
+What remains on in the bottom row is then an affine function of the top-row presses, so solving
+a board reduces to solving a `c` by `c` linear system over GF(2). That system only depends on the
+board's shape, so its Gauss-Jordan elimination is done once per `(r, c)` and cached.
+
+Pressing a cell twice is the same as not pressing it, and the order of presses doesn't matter,
+so solutions are determined up to the nullspace: the press patterns that leave every board
+unchanged. The solver returns the solution with the fewest presses (exactly, if the nullspace
+has at most `2**MAX_EXACT_NULLITY` elements; otherwise, one that can't be improved by adding
+any single nullspace basis vector).
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Final
+
+
+MAX_EXACT_NULLITY: Final[int] = 16
+SOLVE_CACHE_SIZE: Final[int] = 1024
+
+
+def spread(row: int, c: int) -> int:
+    """Returns the lights in a row toggled by pressing the cells in `row`, ignoring the rows above
+    and below."""
+    return (row ^ row << 1 ^ row >> 1) & ((1 << c) - 1)
+
+
+def chase(board: Sequence[int], top: int, c: int) -> tuple[list[int], int]:
+    """Chases the lights down the board, starting with the presses `top` in the first row.
+
+    Returns the forced press pattern and the lights left on in the bottom row afterwards.
+    """
+    presses = [top]
+    prev = 0
+    for i in range(len(board) - 1):
+        cur = presses[-1]
+        presses.append(board[i] ^ spread(cur, c) ^ prev)
+        prev = cur
+    return presses, board[-1] ^ spread(presses[-1], c) ^ prev
+
+
+def pack(rows: Sequence[int], c: int) -> int:
+    """Packs a list of row bitmasks into a single int; bit `i*c + j` is cell `(i, j)`."""
+    packed = 0
+    for i, row in enumerate(rows):
+        packed |= row << i * c
+    return packed
+
+
+def unpack(packed: int, r: int, c: int) -> list[int]:
+    """The inverse of `pack`."""
+    mask = (1 << c) - 1
+    return [packed >> i * c & mask for i in range(r)]
+
+
+@dataclass(frozen=True)
+class _Elimination:
+    # pivots[k] = (column, combination): top-row bit `column` must equal the parity of the
+    # residual bits selected by `combination`
+    pivots: tuple[tuple[int, int], ...]
+    # the board is solvable iff the residual has even parity with each of these
+    checks: tuple[int, ...]
+    # press patterns (packed) spanning the nullspace
+    nullspace: tuple[int, ...]
+
+
+@lru_cache(maxsize=None)
+def _eliminate(r: int, c: int) -> _Elimination:
+    zeros = [0] * r
+
+    # column k of the system: the residual caused by pressing top-row cell k on an empty board
+    cols = [chase(zeros, 1 << k, c)[1] for k in range(c)]
+
+    # row t of the system has bit k set iff column k has bit t set; the combination tracks which
+    # residual bits have been added into each row
+    rows = [sum(1 << k for k in range(c) if cols[k] >> t & 1) for t in range(c)]
+    combos = [1 << t for t in range(c)]
+
+    pivot_rows: list[int] = []
+    pivot_cols: list[int] = []
+    for col in range(c):
+        bit = 1 << col
+        sel = next((t for t in range(len(pivot_rows), c) if rows[t] & bit), None)
+        if sel is None:
+            continue
+        p = len(pivot_rows)
+        rows[p], rows[sel] = rows[sel], rows[p]
+        combos[p], combos[sel] = combos[sel], combos[p]
+        for t in range(c):
+            if t != p and rows[t] & bit:
+                rows[t] ^= rows[p]
+                combos[t] ^= combos[p]
+        pivot_rows.append(p)
+        pivot_cols.append(col)
+
+    rank = len(pivot_rows)
+    pivots = tuple((pivot_cols[p], combos[p]) for p in range(rank))
+    checks = tuple(combos[rank:])
+
+    # free column f gives the null vector with bit f set, plus each pivot column whose reduced
+    # row contains f
+    nullspace: list[int] = []
+    for f in range(c):
+        if f in pivot_cols:
+            continue
+        top = 1 << f
+        for p in range(rank):
+            if rows[p] >> f & 1:
+                top |= 1 << pivot_cols[p]
+        nullspace.append(pack(chase(zeros, top, c)[0], c))
+
+    return _Elimination(pivots, checks, tuple(nullspace))
+
+
+def nullspace(r: int, c: int) -> tuple[int, ...]:
+    """Returns a basis of the press patterns that leave any `r` by `c` board unchanged.
+
+    Each pattern is packed as in `pack`.
+    """
+    return _eliminate(r, c).nullspace
+
+
+def minimize(presses: int, basis: Sequence[int]) -> int:
+    """Returns the press pattern with the fewest presses among `presses` plus the span of `basis`.
+
+    The search is exhaustive if `basis` has at most `MAX_EXACT_NULLITY` vectors. Otherwise, basis
+    vectors are greedily added while that reduces the number of presses.
+    """
+    best = presses
+    if len(basis) <= MAX_EXACT_NULLITY:
+        # walk the whole coset in Gray code order, one XOR per step
+        cur = presses
+        for step in range(1, 1 << len(basis)):
+            cur ^= basis[(step & -step).bit_length() - 1]
+            if cur.bit_count() < best.bit_count():
+                best = cur
+    else:
+        improved = True
+        while improved:
+            improved = False
+            for vec in basis:
+                if (best ^ vec).bit_count() < best.bit_count():
+                    best ^= vec
+                    improved = True
+    return best
+
+
+@lru_cache(maxsize=SOLVE_CACHE_SIZE)
+def _solve(board: tuple[int, ...], c: int) -> int | None:
+    r = len(board)
+    elim = _eliminate(r, c)
+    _, residual = chase(board, 0, c)
+    if any((residual & check).bit_count() & 1 for check in elim.checks):
+        return None
+
+    top = 0
+    for col, combo in elim.pivots:
+        if (residual & combo).bit_count() & 1:
+            top |= 1 << col
+
+    presses, _ = chase(board, top, c)
+    return minimize(pack(presses, c), elim.nullspace)
+
+
+def solve(board: Sequence[int], c: int) -> list[int] | None:
+    """Returns a minimum-press solution for `board`, which has `c` columns.
+
+    The solution is a list of row bitmasks of the cells to press. Returns `None` if the board
+    can't be solved. Results are cached per board state.
+    """
+    if not board:
+        raise ValueError("The board must have at least one row")
+    presses = _solve(tuple(board), c)
+    return None if presses is None else unpack(presses, len(board), c)
@@ -0,0 +1,44 @@
+# pyright: strict
+
+from itertools import product
+
+import pytest
+
+from lightsout_solver import nullspace, pack, solve, unpack
+
+
+def press_all(presses: list[int], c: int) -> list[int]:
+    # the board lit by pressing the cells of `presses` on an empty board, one cell at a time
+    board = [0] * len(presses)
+    for i, j in product(range(len(presses)), range(c)):
+        if presses[i] >> j & 1:
+            for ni, nj in ((i, j), (i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+                if 0 <= ni < len(board) and 0 <= nj < c:
+                    board[ni] ^= 1 << nj
+    return board
+
+
+@pytest.mark.parametrize('r, c', list(product(range(1, 5), repeat=2)))
+def test_solve_is_minimal(r: int, c: int) -> None:
+    # the fewest presses lighting each board, by trying every press pattern
+    fewest: dict[int, int] = {}
+    for packed in range(1 << r * c):
+        board = pack(press_all(unpack(packed, r, c), c), c)
+        fewest[board] = min(fewest.get(board, r * c), packed.bit_count())
+
+    for board in range(1 << r * c):
+        rows = unpack(board, r, c)
+        solution = solve(rows, c)
+        if board not in fewest:
+            assert solution is None
+        else:
+            assert solution is not None
+            assert press_all(solution, c) == rows
+            assert pack(solution, c).bit_count() == fewest[board]
+
+
+@pytest.mark.parametrize('r, c', [(4, 4), (5, 5), (4, 5), (9, 9)])
+def test_nullspace_leaves_boards_unchanged(r: int, c: int) -> None:
+    for vec in nullspace(r, c):
+        assert vec
+        assert press_all(unpack(vec, r, c), c) == [0] * r
@@ -1,5 +1,6 @@
 # pyright: strict
 
+from argparse import ArgumentParser
 from collections.abc import Iterable
 from dataclasses import dataclass
 from enum import Enum, auto
@@ -20,8 +21,18 @@ DIM: Final[int] = 9
 VIS: Final[int] = 7
 HEAD: Final[int] = 20
 
+# endless mode: chunks are CHUNK by CHUNK cells (CHUNK must be even)
+CHUNK: Final[int] = 16
+BORDER_OPENINGS: Final[int] = 2
+LOAD_RADIUS: Final[int] = 2
+EVICT_RADIUS: Final[int] = 3
+
 Cell = tuple[int, int]
 
+# the offsets of the cells that the player sees around them
+VIS_OFFSETS: Final[tuple[Cell, ...]] = tuple((di, dj)
+        for di, dj in product(range(-VIS, VIS + 1), repeat=2) if hypot(di, dj) <= VIS)
+
 
 class CellType(Enum):
     PATH = auto()
@@ -29,11 +40,23 @@ class CellType(Enum):
     EXIT = auto()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class State:
     cell_type: CellType
     seen: bool = False
 
+    @staticmethod
+    def of(cell_type: CellType, seen: bool = False) -> 'State':
+        """Returns the shared instance with the given fields."""
+        return STATES[cell_type, seen]
+
+
+# states are immutable, so every cell with the same fields shares one instance
+STATES: Final[dict[tuple[CellType, bool], State]] = {
+    (cell_type, seen): State(cell_type, seen)
+    for cell_type in CellType for seen in (False, True)
+}
+
 
 class DisjointSets[T]:
     def __init__(self, objs: Iterable[T]):
@@ -53,17 +76,152 @@ class DisjointSets[T]:
         return True
 
 
+@dataclass(frozen=True)
+class Layout:
+    loc: Cell
+    end: Cell
+    paths: frozenset[Cell]  # every non-obstacle cell except the exit
+
+
+def generate_maze(r: int, c: int, seed: int) -> Layout:
+    """Generates a random `r` by `c` maze.
+
+    This doesn't touch pyxel or any grid, so it can run in the background.
+    """
+    rand = Random(seed)
+
+
+    # even indices are 'corners'
+    corners = [(i, j) for i in range(0, r, 2) for j in range(0, c, 2)]
+
+    def generate_loc_end_pairs():
+        while True:
+            loc = li, lj = rand.choice(corners)
+            end = ei, ej = rand.choice(corners)
+            if loc != end:
+                yield abs(li - ei) + abs(lj - ej), loc, end
+
+    _, loc, end = max(islice(generate_loc_end_pairs(), 3))
+
+
+    # generate random maze
+    paths = spanning_paths(rand, r, c)
+    paths.discard(end)
+    return Layout(loc, end, frozenset(paths))
+
+
+def spanning_paths(rand: Random, r: int, c: int) -> set[Cell]:
+    """Returns the path cells of a random `r` by `c` maze where every corner (a cell with even
+    indices) can reach every other in exactly one way."""
+
+    def in_bounds(i: int, j: int) -> bool:
+        return 0 <= i < r and 0 <= j < c
+
+    corners = [(i, j) for i in range(0, r, 2) for j in range(0, c, 2)]
+    paths = set(corners)
+    components = DisjointSets(corners)
+
+    def edgeseq() -> Iterable[tuple[Cell, Cell, Cell]]:
+        for i1, j1 in corners:
+            for di, dj in (+1, 0), (0, +1):
+                im, jm = i1 + di, j1 + dj
+                i2, j2 = im + di, jm + dj
+                if in_bounds(i2, j2):
+                    yield (i1, j1), (i2, j2), (im, jm)
+
+    edges = [*edgeseq()]
+    rand.shuffle(edges)
+    for x, y, mid in edges:
+        assert mid not in paths
+        if components.union(x, y):
+            paths.add(mid)
+
+    return paths
+
+
+# endless mode
+
+@dataclass(slots=True)
+class Chunk:
+    paths: int  # bit i*CHUNK + j is set if cell (i, j) of the chunk is a path
+    seen: int = 0
+
+
+def generate_chunk(seed: int, ci: int, cj: int) -> Chunk:
+    """Generates chunk `(ci, cj)` of the endless maze with the given seed; i.e., the cells from
+    `(ci*CHUNK, cj*CHUNK)` to `(ci*CHUNK + CHUNK - 1, cj*CHUNK + CHUNK - 1)`.
+
+    The same chunk always comes out the same. Its last row and column separate it from the chunks
+    below and to the right, except for `BORDER_OPENINGS` openings each. Since every chunk is a
+    connected maze and opens into all four of its neighbors, the whole endless maze is connected.
+    """
+    rand = Random(f"{seed}:{ci}:{cj}")
+    paths = spanning_paths(rand, CHUNK - 1, CHUNK - 1)
+    for k in rand.sample(range(CHUNK // 2), BORDER_OPENINGS):
+        paths.add((2 * k, CHUNK - 1))
+    for k in rand.sample(range(CHUNK // 2), BORDER_OPENINGS):
+        paths.add((CHUNK - 1, 2 * k))
+    return Chunk(sum(1 << (i * CHUNK + j) for i, j in paths))
+
+
+class ChunkCache:
+    """The chunks of an endless maze near the player, generated when first needed.
+
+    Chunks far from the player are evicted, and regenerated (identically) if the player comes
+    back, so at most `(2*EVICT_RADIUS + 1)**2` chunks are ever kept. Evicted chunks forget which
+    of their cells were seen.
+    """
+
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+        self.chunks: dict[Cell, Chunk] = {}
+        self.generated = 0
+        super().__init__()
+
+    def chunk(self, ci: int, cj: int) -> Chunk:
+        if (chunk := self.chunks.get((ci, cj))) is None:
+            chunk = self.chunks[ci, cj] = generate_chunk(self.seed, ci, cj)
+            self.generated += 1
+        return chunk
+
+    def _locate(self, i: int, j: int) -> tuple[Chunk, int]:
+        ci, li = divmod(i, CHUNK)
+        cj, lj = divmod(j, CHUNK)
+        return self.chunk(ci, cj), li * CHUNK + lj
+
+    def state(self, i: int, j: int) -> State:
+        chunk, bit = self._locate(i, j)
+        cell_type = CellType.PATH if chunk.paths >> bit & 1 else CellType.OBSTACLE
+        return State.of(cell_type, bool(chunk.seen >> bit & 1))
+
+    def see(self, i: int, j: int) -> None:
+        chunk, bit = self._locate(i, j)
+        chunk.seen |= 1 << bit
+
+    def load_around(self, i: int, j: int) -> None:
+        """Generates the chunks within `LOAD_RADIUS` chunks of cell `(i, j)`, and evicts the ones
+        farther than `EVICT_RADIUS` chunks."""
+        ci, cj = i // CHUNK, j // CHUNK
+        for key in [key for key in self.chunks
+                if max(abs(key[0] - ci), abs(key[1] - cj)) > EVICT_RADIUS]:
+            del self.chunks[key]
+        for di, dj in product(range(-LOAD_RADIUS, LOAD_RADIUS + 1), repeat=2):
+            self.chunk(ci + di, cj + dj)
+
+
 class MazeGame(pg.PyxelGrid[State]):
     def __init__(self) -> None:
         self.win = False
         self.solid = False
+        self.generating = False
         self.loc = 0, 0
         self.rand = Random()
         super().__init__(R, C, y_u=HEAD, dim=DIM)
 
 
     def init(self) -> None:
-        self.new_game()
+        # there's no maze to show yet, so the first one is generated right away
+        self.apply_layout(generate_maze(self.r, self.c, self.rand.getrandbits(64)))
 
 
     def update(self) -> None:
@@ -75,7 +233,7 @@ class MazeGame(pg.PyxelGrid[State]):
         if pyxel.btnp(pyxel.KEY_S):
             self.solid = not self.solid
 
-        if not self.win:
+        if not self.win and not self.generating:
             holdf = 8
             repeatf = 2
             if pyxel.btnp(pyxel.KEY_UP, hold=holdf, repeat=repeatf):
@@ -105,48 +263,22 @@ class MazeGame(pg.PyxelGrid[State]):
 
 
     def new_game(self) -> None:
-        self.win = False
-
-
-        # even indices are 'corners'
-        corners = [(i, j) for i in range(0, self.r, 2) for j in range(0, self.c, 2)]
-
-        def generate_loc_end_pairs():
-            while True:
-                loc = li, lj = self.rand.choice(corners)
-                end = ei, ej = self.rand.choice(corners)
-                if loc != end:
-                    yield abs(li - ei) + abs(lj - ej), loc, end
+        # the current maze stays up (frozen) while the next one is generated in the background
+        self.cancel_tasks()
+        self.generating = True
+        self.submit(generate_maze, self.r, self.c, self.rand.getrandbits(64),
+                callback=self.apply_layout)
 
-        _, self.loc, end = max(islice(generate_loc_end_pairs(), 3))
 
+    def apply_layout(self, layout: Layout) -> None:
+        self.win = False
+        self.generating = False
+        self.loc = layout.loc
 
-        # clear grid
         for i in range(self.r):
             for j in range(self.c):
-                self[i, j] = State(CellType.OBSTACLE)
-        for i, j in corners:
-            self[i, j].cell_type = CellType.PATH
-        self[end].cell_type = CellType.EXIT
-
-
-        # generate random maze
-        components = DisjointSets(corners)
-
-        def edgeseq() -> Iterable[tuple[Cell, Cell, Cell]]:
-            for i1, j1 in corners:
-                for di, dj in (+1, 0), (0, +1):
-                    im, jm = i1 + di, j1 + dj
-                    i2, j2 = im + di, jm + dj
-                    if self.in_bounds(i2, j2):
-                        yield (i1, j1), (i2, j2), (im, jm)
-
-        edges = [*edgeseq()]
-        self.rand.shuffle(edges)
-        for x, y, mid in edges:
-            assert self[mid].cell_type == CellType.OBSTACLE
-            if components.union(x, y):
-                self[mid].cell_type = CellType.PATH
+                self[i, j] = State.of(CellType.PATH if (i, j) in layout.paths else CellType.OBSTACLE)
+        self[layout.end] = State.of(CellType.EXIT)
 
 
         # visit initial cell
@@ -155,10 +287,10 @@ class MazeGame(pg.PyxelGrid[State]):
 
     def visit(self) -> None:
         i, j = self.loc
-        for di, dj in product(range(-VIS, VIS + 1), repeat=2):
-            if hypot(di, dj) <= VIS:
-                if self.in_bounds(ni := i + di, nj := j + dj):
-                    self[ni, nj].seen = True
+        for di, dj in VIS_OFFSETS:
+            if self.in_bounds(ni := i + di, nj := j + dj):
+                if not (state := self[ni, nj]).seen:
+                    self[ni, nj] = State.of(state.cell_type, seen=True)
 
 
     def draw_clouds(self, x: int, y: int) -> None:
@@ -166,21 +298,29 @@ class MazeGame(pg.PyxelGrid[State]):
         for dx, dy in product(range(cloud_res), repeat=2):
             cx = x + dx * self.dim / cloud_res
             cy = y + dy * self.dim / cloud_res
-            color = 1 if pyxel.noise(cx / 4 / self.dim, cy / 4 / self.dim, pyxel.frame_count / 80) >= 0.1 else 0
-            pyxel.rect(cx, cy, self.dim / cloud_res, self.dim / cloud_res, color)
+            # the gaps between clouds are the background color, so only the clouds are drawn
+            if pyxel.noise(cx / 4 / self.dim, cy / 4 / self.dim, pyxel.frame_count / 80) >= 0.1:
+                pyxel.rect(cx, cy, self.dim / cloud_res, self.dim / cloud_res, 1)
+
+
+    def fill_cell(self, i: int, j: int) -> int | None:
+        if (state := self[i, j]).seen:
+            if state.cell_type == CellType.PATH:
+                return 3
+            if state.cell_type == CellType.OBSTACLE and self.solid:
+                return 4
+        return None
 
 
     def draw_cell(self, i: int, j: int, x: int, y: int) -> None:
+        # seen paths, and seen obstacles when solid, are filled in by fill_cell
         if self[i, j].seen:
             match self[i, j].cell_type:
                 case CellType.PATH:
-                    pyxel.rect(x, y, self.dim, self.dim, 3)
+                    pass
 
                 case CellType.OBSTACLE:
-                    if self.solid:
-                        pyxel.rect(x, y, self.dim, self.dim, 4)
-                    else:
-                        self.draw_clouds(x, y)
+                    self.draw_clouds(x, y)
 
                 case CellType.EXIT:
                     pyxel.rect(x, y, self.dim, self.dim, 3)
@@ -192,8 +332,10 @@ class MazeGame(pg.PyxelGrid[State]):
         else:
             self.draw_clouds(x, y)
 
-        if (i, j) == self.loc:
-            pyxel.circ(x + self.dim / 2, y + self.dim / 2, self.dim / 4, 5)
+
+    def draw_player(self) -> None:
+        i, j = self.loc
+        pyxel.circ(self.x(j) + self.dim / 2, self.y(i) + self.dim / 2, self.dim / 4, 5)
 
 
     def pre_draw_grid(self) -> None:
@@ -202,14 +344,90 @@ class MazeGame(pg.PyxelGrid[State]):
 
 
     def post_draw_grid(self) -> None:
+        self.draw_player()
+
         if self.win:
             pyxel.text(2, 2, "WIN!!!", 11)
+        elif self.generating:
+            pyxel.text(2, 2, "GENERATING...", 3)
 
         pyxel.text(2, 11, "CONTROLS: N, S, ARROW KEYS", 3)
 
 
+class EndlessMazeGame(MazeGame):
+    """A maze without an exit that goes on forever; the grid is a window on it that follows the
+    player, who always stays at its center.
+
+    The maze is made of chunks, which are generated (and evicted) as the player walks; see
+    `ChunkCache`.
+    """
+
+    def __init__(self, seed: int | None = None) -> None:
+        super().__init__()
+        self.rand = Random(seed)
+        self.chunks = ChunkCache(self.rand.getrandbits(64))
+        self.pos = 0, 0  # the player's position in the endless maze
+        self.loc = self.r // 2, self.c // 2
+
+
+    def init(self) -> None:
+        self.new_game()
+
+
+    def new_game(self) -> None:
+        self.chunks = ChunkCache(self.rand.getrandbits(64))
+        self.pos = 0, 0  # a corner, which is always a path
+        self.visit()
+
+
+    def try_move(self, di: int, dj: int) -> None:
+        i, j = self.pos
+        if self.chunks.state(ni := i + di, nj := j + dj).cell_type != CellType.OBSTACLE:
+            self.pos = ni, nj
+            self.visit()
+
+
+    def visit(self) -> None:
+        i, j = self.pos
+        self.chunks.load_around(i, j)
+        for di, dj in VIS_OFFSETS:
+            self.chunks.see(i + di, j + dj)
+
+        # move the window so the player is at its center
+        top = i - self.loc[0]
+        left = j - self.loc[1]
+        for vi in range(self.r):
+            for vj in range(self.c):
+                self[vi, vj] = self.chunks.state(top + vi, left + vj)
+
+
+    def post_draw_grid(self) -> None:
+        self.draw_player()
+
+        i, j = self.pos
+        pyxel.text(2, 2, f"ENDLESS  ({j}, {-i})  CHUNKS {len(self.chunks.chunks)}", 11)
+        pyxel.text(2, 11, "CONTROLS: N, S, ARROW KEYS", 3)
+
+
+def category(state: State) -> str:
+    return f"{state.cell_type.name.lower()}, {'seen' if state.seen else 'unseen'}"
+
+
 def main():
-    MazeGame().run(title=TITLE)
+    parser = ArgumentParser()
+
+    parser.add_argument('--endless', action='store_true',
+            help="an endless maze, generated as you walk")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--cell-costs', action='store_true',
+            help="show how long each cell takes to draw, and print the slowest ones on exit")
+
+    args = parser.parse_args()
+
+    game = EndlessMazeGame(args.seed) if args.endless else MazeGame()
+    if args.cell_costs:
+        game.enable_cell_costs(category)
+    game.run(title=TITLE)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,110 @@
+# pyright: strict
+
+"""Reports the memory used per cell by the examples' cell states on a large board.
+
+For each example whose cells hold dataclass states, this fills an `n` by `n` grid (1000 by 1000
+by default) with a typical mix of states, once using the old layout (a regular dataclass with a
+per-instance `__dict__`, allocated fresh for every cell) and once using the current slotted,
+shared instances, and prints the bytes per cell as measured by tracemalloc. The grid's own
+storage (its dict and the `(i, j)` keys) is reported separately, since it's the same either way.
+
+The Fruit grid is filled completely, which is the worst case; the game itself only places a
+handful of fruits, but used to allocate new ones on every redistribution.
+
+.. highlight:: bash
+.. code-block:: bash
+
+    python memory_report.py -n 1000
+"""
+
+from argparse import ArgumentParser
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Final
+import gc
+import os
+import sys
+import tracemalloc
+
+ROOT: Final[str] = os.path.dirname(os.path.abspath(__file__))
+for example in 'maze', 'lightsout', 'fruit':
+    sys.path.append(os.path.join(ROOT, example))
+
+from fruit_rules import Fruit, FruitType
+from lightsout_alt import CellState
+from maze import CellType, State
+
+
+DEFAULT_N: Final[int] = 1000
+
+
+# the cell states as they were before they were slotted and shared
+
+@dataclass
+class OldState:
+    cell_type: CellType
+    seen: bool = False
+
+@dataclass
+class OldCellState:
+    on: bool
+
+@dataclass(frozen=True)
+class OldFruit:
+    fruit_type: FruitType
+    rotten: bool = False
+
+
+def maze_cell(i: int, j: int) -> tuple[CellType, bool]:
+    cell_type = CellType.PATH if i % 2 == 0 or j % 2 == 0 else CellType.OBSTACLE
+    return cell_type, (i + j) % 3 == 0
+
+
+def fruit_cell(i: int, j: int) -> tuple[FruitType, bool]:
+    return FruitType((i + j) % 3), (i * j) % 2 == 1
+
+
+CASES: Final[list[tuple[str, Callable[[int, int], object], Callable[[int, int], object]]]] = [
+    ("maze State",
+        lambda i, j: OldState(*maze_cell(i, j)),
+        lambda i, j: State.of(*maze_cell(i, j))),
+    ("lightsout_alt CellState",
+        lambda i, j: OldCellState(on=(i ^ j) % 2 == 1),
+        lambda i, j: CellState.of((i ^ j) % 2 == 1)),
+    ("fruit Fruit",
+        lambda i, j: OldFruit(*fruit_cell(i, j)),
+        lambda i, j: Fruit.of(*fruit_cell(i, j))),
+]
+
+
+def measure(n: int, make: Callable[[int, int], object]) -> int:
+    """Returns the number of bytes allocated for an `n` by `n` grid of `make(i, j)` states."""
+    gc.collect()
+    tracemalloc.start()
+    grid = {(i, j): make(i, j) for i in range(n) for j in range(n)}
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del grid
+    return size
+
+
+def main():
+    parser = ArgumentParser(description="Report per-cell memory of the examples' cell states.")
+
+    parser.add_argument('-n', type=int, default=DEFAULT_N)
+
+    args = parser.parse_args()
+
+    cells = args.n * args.n
+    grid = measure(args.n, lambda i, j: None)
+    print(f"{args.n}x{args.n} grid; bytes per cell")
+    print(f"  {'grid storage (dict and keys)':<32}{grid / cells:>8.1f}")
+    print(f"  {'states':<32}{'before':>8}{'after':>8}")
+    for name, old, new in CASES:
+        before = (measure(args.n, old) - grid) / cells
+        after = (measure(args.n, new) - grid) / cells
+        print(f"  {name:<32}{before:>8.1f}{after:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
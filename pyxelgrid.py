@@ -72,16 +72,914 @@ of it by passing in `layerc` (which defaults to 0). Every layer is drawn one aft
 other. The layers are drawn in increasing order (indexed `0` to `layerc - 1`) after the main grid.
 Each layer is drawn in a similar way as the main grid; `pre_draw_layer()` is called, then the cells
 are drawn in row-major order (via `draw_cell_layer()), then finally, `post_draw_layer()` is called.
+
+Hooks that aren't overridden are skipped altogether, and the cells' coordinates are computed once,
+so a grid that draws everything in, e.g., `pre_draw_grid()` doesn't pay for iterating over its cells.
+
+Cells that are just a solid square of one color can instead be described by overriding
+`fill_cell()`. Then `draw_cell()` is only called for the cells that `fill_cell()` returns `None`
+for, and the filled cells are batched: runs of same-colored cells in a row, and runs that repeat
+in the rows below, are drawn as a single `pyxel.rect` each.
+
+To measure how fast a game runs, call `enable_frame_stats()` before `run()`. The achieved frame rate
+and the time spent in updating and drawing are then printed when the game exits. Similarly,
+`enable_allocation_stats()` traces memory allocations with tracemalloc and reports, for the update
+and for each drawing phase, how much memory was allocated, how often the garbage collector ran, and
+which lines retained the most memory. A game loop in a steady state should allocate nothing.
+`enable_latency_stats()` measures the time from each input event that changes something to the end
+of the first frame drawn after it, i.e., how sluggish the game feels.
+
+Turn-based games can pass `skip_idle_frames=True` to skip drawing "quiescent" frames, keeping the
+previous frame on screen instead. A frame is quiescent if no cell state was written, no input event
+(key, mouse button, mouse movement or wheel) happened, `request_redraw()` wasn't called, the
+`animating` property is false, and no drawing hook is decorated with `@animated`. Any state that's
+drawn but isn't stored in the cells (e.g., a "win" flag) should call `request_redraw()` when it
+changes.
+
+Cell changes can be recorded for undo and redo by calling `enable_journal()`. Every `__setitem__` or
+`pop` is then appended to a journal; changes made inside a `with grid.transaction():` block form a
+single entry, which `undo()` and `redo()` revert and reapply in time proportional to the number of
+changed cells. The oldest entries are evicted once the journal exceeds its configured size.
+Changes made inside a `with grid.unrecorded():` block, e.g., ones the player didn't make, are left
+out of it.
+Subclasses that keep their state outside the grid's cells should report changes via `_changed()`.
+
+Games whose cells change on their own (e.g., timers, animations or spreading fire) can call
+`enable_cell_updates()` and override `update_cell()`. It's called every frame, right after
+`update()`, but only for the cells that are scheduled: cells schedule themselves by returning how
+many frames to sleep, and are woken up by `wake()` or by writes to nearby cells. Cells that sleep
+cost nothing, so a large board with a few active cells updates as fast as a small one.
+
+Heavy computations (e.g., generating a level or running a solver) shouldn't run inside `update()`,
+since the game can't draw while they do. Instead, `submit()` runs a function in a background thread
+(or process) and returns a `Task`. When the function finishes, its callback is called on the main
+thread, at the start of a later frame's update, so it can safely use pyxel and change cell states.
+Pending tasks can be cancelled, e.g., when a new game starts, so their callbacks never run.
+
+A grid can also be drawn somewhere other than the screen's top-left corner, e.g., when several games
+share one pyxel session; see `set_origin()`. Resource files should then be loaded through
+`load_resource()`, which doesn't reload a file that's already loaded.
+
+Other processes (e.g., bots, analytics or spectator views) can watch a running game through
+`enable_export()`, which mirrors the cells into shared memory, encoded as 32-bit ints. The memory
+has a fixed layout (see `GridExport`) and a sequence counter that's odd while a frame's changes are
+being written, so a `GridExportReader` can read a consistent snapshot without locks, sockets or
+serialization. The game never waits for readers.
+
+`state_hash()` identifies the whole board by a 64-bit Zobrist hash, which is updated on every change
+instead of recomputed, so it can be used as a cache key or to detect repeated positions every frame.
+Similarly, `enable_region_sums()` keeps the sums of a number derived from each state (e.g., 1 for a
+lit light and 0 otherwise) in a Fenwick tree, so that `region_sum()` totals any rectangle of cells
+in logarithmic time instead of visiting each one. Every change pays for the update, so grids that
+only query sums some of the time can `disable_region_sums()` in between.
+
+When a few cells are much slower to draw than the rest, `enable_cell_costs()` times the per-cell
+hooks and reports the most expensive cells and kinds of state, and can tint each cell over the grid
+by how long it takes to draw.
 """
 
-from itertools import product
-from typing import Any, Final, Generic, TypeVar
+from collections import Counter, deque
+from collections.abc import Callable, Generator, Hashable, Iterable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from enum import Enum, auto
+from functools import cache, partial
+from hashlib import blake2b
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter
+from typing import Any, Final, Generic, TypeVar, cast
+import atexit
+import gc
+import inspect
+import os
+import struct
+import sys
+import tracemalloc
 
 import pyxel as pyx
 
 _DIM: Final[int] = 8
+_JOURNAL_ENTRIES: Final[int] = 1000
+_ALLOCATION_SITES: Final[int] = 10
+_SNAPSHOT_EVERY: Final[int] = 60
+_ZOBRIST_SEED: Final[int] = 0
+_WHEEL_SLOTS: Final[int] = 256
+_COSTLY_CELLS: Final[int] = 10
+_HEAT_COLORS: Final[tuple[int, ...]] = (5, 12, 11, 10, 9, 8)  # from cheap to expensive
+
+_EXPORT_MAGIC: Final[bytes] = b'PYXGRID1'
+_EXPORT_HEADER: Final[struct.Struct] = struct.Struct('<8sIIQQ')  # magic, r, c, sequence, frame
+_EXPORT_SEQUENCE: Final[int] = 16  # offset of the sequence number
+_EXPORT_SEQUENCE_FRAME: Final[struct.Struct] = struct.Struct('<QQ')
+EXPORT_UNSET: Final[int] = -2**31
+
+_ANIMATED_ATTR: Final[str] = '_pyxelgrid_animated'
+_DRAW_HOOKS: Final[tuple[str, ...]] = (
+    'draw_cell', 'draw_cell_layer',
+    'pre_draw_grid', 'post_draw_grid',
+    'pre_draw_layer', 'post_draw_layer',
+)
 
 T = TypeVar('T')
+R = TypeVar('R')
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+def animated(hook: F) -> F:
+    """Marks a drawing hook as animated, i.e., its output may change every frame even if nothing
+    else did. Frames of a grid with an animated hook are never skipped as idle."""
+    setattr(hook, _ANIMATED_ATTR, True)
+    return hook
+
+
+_loaded_resource: str | None = None
+
+def load_resource(filename: str) -> None:
+    """Loads a pyxel resource file (via `pyxel.load`), unless it's already the one loaded.
+
+    This way, when several games share a single pyxel session, switching back to a game doesn't
+    reload its resources.
+    """
+    global _loaded_resource
+    path = os.path.abspath(filename)
+    if path != _loaded_resource:
+        pyx.load(path)
+        _loaded_resource = path
+
+
+_input_keys: list[int] | None = None
+_input_frame: int | None = None  # the frame whose input was last polled
+_input_seen = False  # and whether there was any
+
+def _input_event() -> bool:
+    """Returns whether any key or button was pressed or released this frame.
+
+    This polls every key and button, so it's only done once per frame; later calls in the same
+    frame return the same answer.
+    """
+    global _input_keys, _input_frame, _input_seen
+    if _input_frame != pyx.frame_count:
+        if _input_keys is None:
+            _input_keys = [getattr(pyx, name) for name in dir(pyx)
+                    if name.startswith(('KEY_', 'MOUSE_BUTTON_', 'GAMEPAD1_', 'GAMEPAD2_',
+                        'GAMEPAD3_', 'GAMEPAD4_'))]
+        _input_seen = any(pyx.btnp(key) or pyx.btnr(key) for key in _input_keys)
+        _input_frame = pyx.frame_count
+    return _input_seen
+
+
+class FrameStats:
+    """Accumulated timings of the frames run so far."""
+
+    def __init__(self) -> None:
+        self.updates = 0
+        self.draws = 0
+        self.skipped = 0
+        self.update_time = 0.0
+        self.draw_time = 0.0
+        self.start: float | None = None
+        self.end: float | None = None
+        super().__init__()
+
+    def add_update(self, start: float, end: float) -> None:
+        if self.start is None:
+            self.start = start
+        self.end = end
+        self.updates += 1
+        self.update_time += end - start
+
+    def add_draw(self, start: float, end: float) -> None:
+        self.end = end
+        self.draws += 1
+        self.draw_time += end - start
+
+    def add_skip(self) -> None:
+        self.skipped += 1
+
+    @property
+    def fps(self) -> float:
+        """The achieved number of frames per second."""
+        if self.start is None or self.end is None or self.end <= self.start:
+            return 0.0
+        return self.updates / (self.end - self.start)
+
+    def report(self) -> str:
+        def per_call(total: float, calls: int) -> str:
+            return f"{total / calls * 1000:.3f} ms" if calls else "n/a"
+
+        return (f"frames: {self.updates}, fps: {self.fps:.2f}\n"
+                f"update: {per_call(self.update_time, self.updates)} per frame, "
+                f"{self.update_time:.3f} s total\n"
+                f"draw: {per_call(self.draw_time, self.draws)} per drawn frame, "
+                f"{self.draw_time:.3f} s total, {self.skipped} idle frames skipped")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LatencyStats:
+    """The input-to-display latencies of the frames run so far; see
+    `PyxelGrid.enable_latency_stats()`.
+
+    An input event (a key or button being pressed or released) is timestamped when the update of
+    its frame starts, which is as soon as pyxel lets the game see it. If the update changes any
+    state, the input is tagged, and its latency is the time until the end of the first frame
+    drawn after it. Inputs that change nothing aren't counted.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.inputs = 0
+        self.latencies: list[float] = []  # from the input to the end of drawing, in seconds
+        self.handling: list[float] = []  # from the input to the end of its update, in seconds
+        self.frames: Counter[int] = Counter()  # the number of frames from the input to its display
+        self._input: tuple[float, int] | None = None
+        self._caused = False
+        self._awaiting: tuple[float, int, float] | None = None
+        super().__init__()
+
+    def start_update(self, now: float, frame: int, input_event: bool) -> None:
+        if input_event:
+            self.inputs += 1
+            self._input = now, frame
+            self._caused = False
+
+    def changed(self) -> None:
+        if self._input is not None:
+            self._caused = True
+
+    def end_update(self, now: float) -> None:
+        if self._input is not None:
+            # if an earlier change still isn't displayed, the latency is counted from that one
+            if self._caused and self._awaiting is None:
+                self._awaiting = *self._input, now
+            self._input = None
+
+    def displayed(self, now: float, frame: int) -> None:
+        if self._awaiting is not None:
+            start, start_frame, handled = self._awaiting
+            self.latencies.append(now - start)
+            self.handling.append(handled - start)
+            self.frames[frame - start_frame] += 1
+            self._awaiting = None
+
+    def report(self) -> str:
+        def distribution(values: list[float]) -> str:
+            if not values:
+                return "n/a"
+            return (f"mean {sum(values) / len(values) * 1000:.3f} ms, " + ", ".join(
+                    f"p{round(q * 100)} {_percentile(values, q) * 1000:.3f} ms"
+                    for q in (0.5, 0.9, 0.99)) + f", max {max(values) * 1000:.3f} ms")
+
+        frames = ", ".join(f"{count} after {n}" for n, count in sorted(self.frames.items()))
+        return (f"{self.name}: {self.inputs} input events, "
+                f"{len(self.latencies)} changed the state\n"
+                f"input to display: {distribution(self.latencies)}\n"
+                f"input to handled: {distribution(self.handling)}\n"
+                f"frames until displayed: {frames or 'n/a'}")
+
+
+class PhaseAllocations:
+    """Accumulated allocations of one phase of the frame (the update, or a drawing phase)."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.allocating_calls = 0
+        self.retained = 0
+        self.peak = 0
+        self.peak_total = 0
+        self.collections = 0
+        self.sites: Counter[str] = Counter()
+        super().__init__()
+
+    def add(self, retained: int, peak: int, collections: int) -> None:
+        self.calls += 1
+        if peak > 0:
+            self.allocating_calls += 1
+        self.retained += retained
+        self.peak = max(self.peak, peak)
+        self.peak_total += peak
+        self.collections += collections
+
+
+def _collections() -> int:
+    return sum(gen['collections'] for gen in gc.get_stats())
+
+
+class AllocationStats:
+    """Accumulated allocations of the frames run so far; see `PyxelGrid.enable_allocation_stats()`.
+
+    For every phase, the memory allocated on top of what was in use when the phase started is
+    traced, as well as how much of it is still in use when the phase ends ("retained"). Every
+    `snapshot_every` frames, tracemalloc snapshots are also taken around each phase, to find the
+    lines where the retained memory was allocated.
+    """
+
+    def __init__(self, top: int, snapshot_every: int) -> None:
+        self.top = top
+        self.snapshot_every = snapshot_every
+        self.frames = 0
+        self.phases: dict[str, PhaseAllocations] = {}
+        self._sampling = False
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ]
+        super().__init__()
+
+        # the measurements themselves allocate a little; that's measured on empty phases, and
+        # subtracted from every phase
+        self._overhead = self._last = 0, 0
+        for _ in range(4):
+            with self.phase(''):
+                pass
+        del self.phases['']
+        self._overhead = self._last
+
+    def start_frame(self) -> None:
+        self._sampling = self.frames % self.snapshot_every == 0
+        self.frames += 1
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        if name not in self.phases:
+            self.phases[name] = PhaseAllocations()
+        allocations = self.phases[name]
+
+        snapshot = tracemalloc.take_snapshot() if self._sampling else None
+        collections = _collections()
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            end, peak = tracemalloc.get_traced_memory()
+            self._last = end - start, peak - start
+            allocations.add(max(0, end - start - self._overhead[0]),
+                    max(0, peak - start - self._overhead[1]), _collections() - collections)
+            if snapshot is not None:
+                self._add_sites(allocations, snapshot)
+
+    def _add_sites(self, allocations: PhaseAllocations, snapshot: tracemalloc.Snapshot) -> None:
+        after = tracemalloc.take_snapshot().filter_traces(self._filters)
+        for diff in after.compare_to(snapshot.filter_traces(self._filters), 'lineno'):
+            frame = diff.traceback[0]
+            if diff.size_diff > 0 and not _measuring(frame):
+                allocations.sites[f"{frame.filename}:{frame.lineno}"] += diff.size_diff
+
+    def report(self) -> str:
+        lines = [f"frames: {self.frames}, allocations per phase (bytes):"]
+        for name, allocations in self.phases.items():
+            calls = max(1, allocations.calls)
+            lines.append(f"  {name}: {allocations.allocating_calls}/{allocations.calls} calls "
+                    f"allocating, {allocations.peak_total / calls:.0f} allocated per call "
+                    f"(at most {allocations.peak}), {allocations.retained / calls:.0f} retained "
+                    f"per call, {allocations.collections} gc collections")
+            for site, size in allocations.sites.most_common(self.top):
+                lines.append(f"    {size:>10} {site}")
+        return '\n'.join(lines)
+
+
+_NO_PHASE: Final[AbstractContextManager[None]] = nullcontext()
+
+@cache
+def _measuring_lines() -> frozenset[int]:
+    # the lines of this file that allocate while measuring, which aren't reported as allocation
+    # sites; the source of `phase` is looked up since it's wrapped by `contextmanager`
+    lines = {line for code in (_collections.__code__, PhaseAllocations.add.__code__)
+            for _, _, line in code.co_lines() if line is not None}
+    source, first = inspect.getsourcelines(AllocationStats.phase)
+    lines.update(range(first, first + len(source)))
+    return frozenset(lines)
+
+def _measuring(frame: tracemalloc.Frame) -> bool:
+    return frame.filename == __file__ and frame.lineno in _measuring_lines()
+
+
+class CellCosts:
+    """Accumulated drawing time of each cell, and of each category of cell state; see
+    `PyxelGrid.enable_cell_costs()`.
+
+    The time of every call to a per-cell hook is added to its cell and to the category of the
+    cell's state at that time. Timing a call itself takes a little time; that's measured on an
+    empty hook, and subtracted from every call.
+    """
+
+    def __init__(self, r: int, c: int, top: int, heatmap: bool) -> None:
+        self.top = top
+        self.heatmap = heatmap
+        self.frames = 0
+        self.cells: list[list[float]] = [[0.0] * c for _ in range(r)]
+        self.categories: dict[Hashable, float] = {}
+        self.category_calls: Counter[Hashable] = Counter()
+        super().__init__()
+
+        def nothing(i: int, j: int) -> None:
+            pass
+
+        def no_category(i: int, j: int) -> Hashable:
+            return None
+
+        self._overhead = 0.0
+        empty = self.timed(nothing, no_category)
+        start = perf_counter()
+        for _ in range(100):
+            empty(0, 0)
+        self._overhead = (perf_counter() - start) / 100
+
+        # forget the calibration calls; the rows are reset in place, since timed() keeps them
+        for row in self.cells:
+            row[:] = [0.0] * c
+        self.categories.clear()
+        self.category_calls.clear()
+
+    def timed(self, hook: Callable[..., R], category: Callable[[int, int], Hashable]
+            ) -> Callable[..., R]:
+        """Returns `hook`, wrapped so that its calls are timed; its first two arguments must be
+        the cell's coordinates."""
+        cells = self.cells
+        categories = self.categories
+        category_calls = self.category_calls
+        overhead = self._overhead
+
+        def timed_hook(i: int, j: int, *args: Any) -> R:
+            start = perf_counter()
+            result = hook(i, j, *args)
+            elapsed = max(0.0, perf_counter() - start - overhead)
+            cells[i][j] += elapsed
+            key = category(i, j)
+            categories[key] = categories.get(key, 0.0) + elapsed
+            category_calls[key] += 1
+            return result
+
+        return timed_hook
+
+    def per_frame(self, i: int, j: int) -> float:
+        """The average time spent drawing cell `(i, j)` per frame, in seconds."""
+        return self.cells[i][j] / max(1, self.frames)
+
+    def top_cells(self, n: int | None = None) -> list[tuple[tuple[int, int], float]]:
+        """The `n` (by default, `top`) most expensive cells, and their total drawing times."""
+        totals = [((i, j), cost) for i, row in enumerate(self.cells)
+                for j, cost in enumerate(row) if cost > 0]
+        totals.sort(key=lambda total: total[1], reverse=True)
+        return totals[:self.top if n is None else n]
+
+    def top_categories(self, n: int | None = None) -> list[tuple[Hashable, float, int]]:
+        """The `n` (by default, `top`) most expensive state categories, with their total drawing
+        times and their numbers of calls."""
+        totals = sorted(self.categories.items(), key=lambda total: total[1], reverse=True)
+        return [(key, cost, self.category_calls[key])
+                for key, cost in totals[:self.top if n is None else n]]
+
+    def report(self) -> str:
+        frames = max(1, self.frames)
+        total = sum(map(sum, self.cells))
+        lines = [f"frames: {self.frames}, cell drawing: {total / frames * 1000:.3f} ms per frame",
+                "most expensive cells (ms per frame, share):"]
+        for ij, cost in self.top_cells():
+            lines.append(f"  {cost / frames * 1000:>9.4f} {cost / total:>6.1%} {ij}")
+        lines.append("most expensive state categories (ms per frame, us per call, calls):")
+        for key, cost, calls in self.top_categories():
+            lines.append(f"  {cost / frames * 1000:>9.4f} {cost / calls * 1e6:>8.2f} "
+                    f"{calls:>9} {key}")
+        return '\n'.join(lines)
+
+
+_executors: dict[bool, Executor] = {}
+
+def _executor(process: bool) -> Executor:
+    # shared by every grid in the program
+    if process not in _executors:
+        _executors[process] = ProcessPoolExecutor() if process else ThreadPoolExecutor()
+    return _executors[process]
+
+
+class Task(Generic[R]):
+    """A handle to a function running in the background; see `PyxelGrid.submit()`."""
+
+    def __init__(self, future: Future[R], callback: Callable[[R], None] | None) -> None:
+        self._future = future
+        self._callback = callback
+        self._cancelled = False
+        super().__init__()
+
+    @property
+    def done(self) -> bool:
+        """Whether the function has finished (or was cancelled)."""
+        return self._cancelled or self._future.done()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        """Cancels the task; its callback won't be called.
+
+        The function is only stopped if it hasn't started yet; otherwise, its result is discarded.
+        """
+        self._cancelled = True
+        self._future.cancel()
+
+    def _deliver(self) -> None:
+        # raises the function's exception, if any, on the main thread
+        result = self._future.result()
+        if self._callback is not None:
+            self._callback(result)
+
+
+class Unset(Enum):
+    """The "state" of a cell that isn't initialized, in journal entries."""
+    UNSET = auto()
+
+UNSET: Final = Unset.UNSET
+
+
+Change = tuple[tuple[int, int], T | Unset, T | Unset]
+
+
+class Journal(Generic[T]):
+    """A bounded history of cell changes, grouped into entries, for undo and redo.
+
+    Each entry is a tuple of `(ij, old, new)` changes, with at most one change per cell.
+    """
+
+    def __init__(self, max_entries: int | None, max_changes: int | None) -> None:
+        self.max_entries = max_entries
+        self.max_changes = max_changes
+        self.paused = False
+        self._undo: deque[tuple[Change[T], ...]] = deque()
+        self._redo: list[tuple[Change[T], ...]] = []
+        self._changes = 0
+        self._depth = 0
+        self._open: dict[tuple[int, int], list[T | Unset]] = {}
+        super().__init__()
+
+    def __len__(self) -> int:
+        return len(self._undo)
+
+    @property
+    def changes(self) -> int:
+        """The total number of cell changes in the undo history."""
+        return self._changes
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def begin(self) -> None:
+        self._depth += 1
+
+    def commit(self) -> None:
+        self._depth -= 1
+        if self._depth or not self._open:
+            return
+
+        entry = tuple((ij, old, new) for ij, (old, new) in self._open.items() if old is not new)
+        self._open = {}
+        if not entry:
+            return
+
+        self._undo.append(entry)
+        self._changes += len(entry)
+        self._redo.clear()
+        self._evict()
+
+    def record(self, ij: tuple[int, int], old: T | Unset, new: T | Unset) -> None:
+        if self.paused:
+            return
+        if ij in self._open:
+            self._open[ij][1] = new
+        else:
+            self._open[ij] = [old, new]
+        if not self._depth:
+            self._depth = 1
+            self.commit()
+
+    def pop_undo(self) -> tuple[Change[T], ...] | None:
+        if not self._undo:
+            return None
+        entry = self._undo.pop()
+        self._changes -= len(entry)
+        self._redo.append(entry)
+        return entry
+
+    def pop_redo(self) -> tuple[Change[T], ...] | None:
+        if not self._redo:
+            return None
+        entry = self._redo.pop()
+        self._undo.append(entry)
+        self._changes += len(entry)
+        self._evict()
+        return entry
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+        self._changes = 0
+
+    def _evict(self) -> None:
+        while self._undo and (
+                (self.max_entries is not None and len(self._undo) > self.max_entries) or
+                (self.max_changes is not None and self._changes > self.max_changes)):
+            self._changes -= len(self._undo.popleft())
+
+
+class Zobrist(Generic[T]):
+    """A Zobrist hash of the cells' states, updated in constant time per change; see
+    `PyxelGrid.state_hash()`.
+
+    Every (cell, state) pair has a random 64-bit key, and the hash is the XOR of the keys of every
+    initialized cell. The keys are hashes (BLAKE2b) of `seed`, the cell and the state's `repr`, so
+    the same board hashes the same in every run and every process, as long as the states' `repr`s
+    are deterministic. They're computed the first time they're needed, and cached.
+    """
+
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+        self.value = 0
+        self._keys: dict[tuple[tuple[int, int], T], int] = {}
+        self._reprs: dict[T, bytes] = {}
+        super().__init__()
+
+    def key(self, ij: tuple[int, int], state: T | Unset) -> int:
+        if isinstance(state, Unset):
+            return 0
+        if (key := self._keys.get((ij, state))) is None:
+            if (name := self._reprs.get(state)) is None:
+                name = self._reprs[state] = repr(state).encode()
+            i, j = ij
+            digest = blake2b(b'%d:%d:%d:%s' % (self.seed, i, j, name), digest_size=8).digest()
+            key = self._keys[ij, state] = int.from_bytes(digest, 'little')
+        return key
+
+    def update(self, ij: tuple[int, int], old: T | Unset, new: T | Unset) -> None:
+        self.value ^= self.key(ij, old) ^ self.key(ij, new)
+
+
+class RegionSums(Generic[T]):
+    """The sums of `project(state)` over rectangular regions of cells, kept in a 2D Fenwick tree;
+    see `PyxelGrid.region_sum()`.
+
+    Changing a cell and summing a region both take O(log r * log c) time. Uninitialized cells
+    count as 0.
+    """
+
+    def __init__(self, r: int, c: int, project: Callable[[T], int]) -> None:
+        self.r = r
+        self.c = c
+        self.project = project
+        self._values = [[0] * c for _ in range(r)]
+        self._tree = [[0] * (c + 1) for _ in range(r + 1)]
+        super().__init__()
+
+    def build(self, values: list[list[int]]) -> None:
+        """Replaces every cell's value at once, in O(r * c) time."""
+        r, c = self.r, self.c
+        self._values = [[*row] for row in values]
+        tree = self._tree = [[0, *row] for row in [[0] * c, *values]]
+        # every node adds itself to its parent, in each dimension
+        for row in tree:
+            for l in range(1, c + 1):
+                if (parent := l + (l & -l)) <= c:
+                    row[parent] += row[l]
+        for k in range(1, r + 1):
+            if (parent := k + (k & -k)) <= r:
+                parent_row = tree[parent]
+                for l, value in enumerate(tree[k]):
+                    parent_row[l] += value
+
+    def update(self, ij: tuple[int, int], state: T | Unset) -> None:
+        i, j = ij
+        value = 0 if isinstance(state, Unset) else self.project(state)
+        if not (delta := value - self._values[i][j]):
+            return
+        self._values[i][j] = value
+        tree = self._tree
+        k = i + 1
+        while k <= self.r:
+            row = tree[k]
+            l = j + 1
+            while l <= self.c:
+                row[l] += delta
+                l += l & -l
+            k += k & -k
+
+    def _prefix(self, i: int, j: int) -> int:
+        # the sum of rows 0 to i - 1, columns 0 to j - 1
+        total = 0
+        tree = self._tree
+        k = i
+        while k > 0:
+            row = tree[k]
+            l = j
+            while l > 0:
+                total += row[l]
+                l -= l & -l
+            k -= k & -k
+        return total
+
+    def sum(self, i0: int, j0: int, i1: int, j1: int) -> int:
+        i0, j0 = max(i0, 0), max(j0, 0)
+        i1, j1 = min(i1, self.r), min(j1, self.c)
+        if i0 >= i1 or j0 >= j1:
+            return 0
+        return (self._prefix(i1, j1) - self._prefix(i0, j1)
+                - self._prefix(i1, j0) + self._prefix(i0, j0))
+
+
+class CellScheduler:
+    """The cells waiting for their `PyxelGrid.update_cell()` calls, on a timer wheel; see
+    `PyxelGrid.enable_cell_updates()`.
+
+    Cells are scheduled for a "tick", the index of a cell update phase (one per frame). Each slot
+    of the wheel holds the cells due at the ticks congruent to it modulo the number of slots, so
+    scheduling a cell and finding the cells due at a tick both take time proportional to the
+    number of cells involved, not to the size of the grid or to how far ahead they're due.
+    """
+
+    def __init__(self, slots: int = _WHEEL_SLOTS) -> None:
+        self.tick = 0  # the tick of the next cell update phase
+        self.due: dict[tuple[int, int], int] = {}  # the earliest tick of every scheduled cell
+        self._wheel: list[list[tuple[int, int]]] = [[] for _ in range(slots)]
+        super().__init__()
+
+    def __len__(self) -> int:
+        return len(self.due)
+
+    def schedule(self, ij: tuple[int, int], tick: int) -> None:
+        """Schedules cell `ij` for `tick`, unless it's already scheduled for then or earlier."""
+        if (due := self.due.get(ij)) is not None and due <= tick:
+            return
+        self.due[ij] = tick
+        self._wheel[tick % len(self._wheel)].append(ij)
+
+    def reschedule(self, ij: tuple[int, int], tick: int) -> None:
+        """Schedules cell `ij` for `tick`, instead of whenever it was scheduled for."""
+        if self.due.get(ij) == tick:
+            return
+        self.due[ij] = tick
+        self._wheel[tick % len(self._wheel)].append(ij)
+
+    def take_due(self) -> list[tuple[int, int]]:
+        """Starts the next tick, and returns the cells due at it (which are then unscheduled)."""
+        tick = self.tick
+        self.tick += 1
+        index = tick % len(self._wheel)
+        slot = self._wheel[index]
+        later: list[tuple[int, int]] = []
+        self._wheel[index] = later
+        ready: list[tuple[int, int]] = []
+        due = self.due
+        for ij in slot:
+            if (when := due.get(ij)) == tick:
+                del due[ij]
+                ready.append(ij)
+            elif when is not None and when > tick and when % len(self._wheel) == index:
+                later.append(ij)  # due on a later turn of the wheel
+            # otherwise, the cell was rescheduled for another tick, or this is a duplicate
+        return ready
+
+    def clear(self) -> None:
+        self.due.clear()
+        for slot in self._wheel:
+            slot.clear()
+
+
+class GridExport(Generic[T]):
+    """A copy of a grid's cells in shared memory, kept up to date for other processes to read.
+
+    The memory starts with a 32-byte little-endian header: the magic bytes `PYXGRID1`, the number
+    of rows and of columns (unsigned 32-bit), the sequence number and the frame number of the last
+    changes (unsigned 64-bit). The cells follow in row-major order as signed 32-bit ints in native
+    byte order, with `EXPORT_UNSET` for cells that aren't initialized.
+
+    The sequence number is incremented (to an odd number) before the first change of a frame is
+    written, and again (to an even number) when the frame's changes are published.
+    """
+
+    def __init__(self, r: int, c: int, encode: Callable[[T], int], name: str | None = None) -> None:
+        self.r = r
+        self.c = c
+        self._encode = encode
+        self._shm = SharedMemory(name, create=True, size=_EXPORT_HEADER.size + r * c * 4)
+        if (buf := self._shm.buf) is None:
+            raise RuntimeError(f"Shared memory {self._shm.name} has no buffer")
+        self._buf: memoryview = buf
+        self._cells: memoryview = buf[_EXPORT_HEADER.size:].cast('i')
+        self._sequence = 0
+        self._writing = False
+        _EXPORT_HEADER.pack_into(buf, 0, _EXPORT_MAGIC, r, c, 0, 0)
+        super().__init__()
+
+    @property
+    def name(self) -> str:
+        """The name to attach to the shared memory with, e.g., by `GridExportReader`."""
+        return self._shm.name
+
+    def write(self, ij: tuple[int, int], state: T | Unset) -> None:
+        if not self._writing:
+            self._writing = True
+            self._sequence += 1
+            struct.pack_into('<Q', self._buf, _EXPORT_SEQUENCE, self._sequence)
+        i, j = ij
+        self._cells[i * self.c + j] = EXPORT_UNSET if state is UNSET else self._encode(state)
+
+    def publish(self, frame: int) -> None:
+        """Makes the changes written since the last call visible to readers, as of `frame`."""
+        if self._writing:
+            self._writing = False
+            self._sequence += 1
+            _EXPORT_SEQUENCE_FRAME.pack_into(self._buf, _EXPORT_SEQUENCE, self._sequence, frame)
+
+    def close(self) -> None:
+        """Releases and removes the shared memory; readers that are still attached keep theirs."""
+        self._cells.release()
+        self._shm.close()
+        self._shm.unlink()
+
+
+class GridExportReader:
+    """Attaches to the shared memory of a `GridExport`, possibly from another process.
+
+    `snapshot()` returns a consistent copy of the cells. To avoid the copy, read `cells` directly,
+    between `begin()` and `valid()`:
+
+    .. code-block:: python
+
+        while True:
+            sequence = reader.begin()
+            alive = sum(reader.cells[i, j] > 0 for i in range(reader.r) for j in range(reader.c))
+            if reader.valid(sequence):
+                break
+    """
+
+    def __init__(self, name: str) -> None:
+        if sys.version_info >= (3, 13):
+            self._shm = SharedMemory(name, track=False)
+        else:
+            self._shm = SharedMemory(name)
+            # otherwise, the memory would be unlinked when this process exits, while the game
+            # still uses it
+            resource_tracker.unregister(cast(str, getattr(self._shm, '_name')), 'shared_memory')
+
+        if (buf := self._shm.buf) is None:
+            self._shm.close()
+            raise RuntimeError(f"Shared memory {name} has no buffer")
+        magic, self.r, self.c, _, _ = _EXPORT_HEADER.unpack_from(buf)
+        if magic != _EXPORT_MAGIC:
+            self._shm.close()
+            raise ValueError(f"{name} is not an exported grid")
+        self._buf: memoryview = buf
+        self._raw: memoryview = buf[_EXPORT_HEADER.size:_EXPORT_HEADER.size + self.r * self.c * 4]
+        self._cells: memoryview = self._raw.cast('i', (self.r, self.c))
+        super().__init__()
+
+    @property
+    def cells(self) -> memoryview:
+        """The live cells, indexed by `[i, j]`; they may change at any moment."""
+        return self._cells
+
+    def _sequence_frame(self) -> tuple[int, int]:
+        return _EXPORT_SEQUENCE_FRAME.unpack_from(self._buf, _EXPORT_SEQUENCE)
+
+    @property
+    def sequence(self) -> int:
+        """The current sequence number; it only changes when the game publishes changes."""
+        return self._sequence_frame()[0]
+
+    def begin(self) -> int:
+        """Waits until no changes are being written, and returns the sequence number."""
+        while (sequence := self.sequence) & 1:
+            pass
+        return sequence
+
+    def valid(self, sequence: int) -> bool:
+        """Returns whether the cells are unchanged since `begin()` returned `sequence`."""
+        return self.sequence == sequence
+
+    def snapshot(self) -> tuple[int, memoryview]:
+        """Returns the frame number of the last changes, and a consistent copy of the cells."""
+        while True:
+            sequence = self.begin()
+            frame = self._sequence_frame()[1]
+            data = bytes(self._raw)
+            if self.valid(sequence):
+                return frame, memoryview(data).cast('i', (self.r, self.c))
+
+    def close(self) -> None:
+        self._cells.release()
+        self._raw.release()
+        self._shm.close()
+
 
 class PyxelGrid(Generic[T]):
     def __init__(self,
@@ -91,7 +989,8 @@ class PyxelGrid(Generic[T]):
             x_r: int = 0,
             y_u: int = 0,
             y_d: int = 0,
-            layerc: int = 0):
+            layerc: int = 0,
+            skip_idle_frames: bool = False):
         """Create a PyxelGrid instance which represents a Pyxel game that's inherently
         "grid-based"."""
 
@@ -107,6 +1006,30 @@ class PyxelGrid(Generic[T]):
         self._layerc = layerc
         self._dim = dim
         self._cell_state: dict[tuple[int, int], T] = {}
+        self._frame_stats: FrameStats | None = None
+        self._allocation_stats: AllocationStats | None = None
+        self._cell_costs: CellCosts | None = None
+        self._latency_stats: LatencyStats | None = None
+        self._cost_category: Callable[[T], Hashable] = repr
+        self._skip_idle_frames = skip_idle_frames
+        self._animated_hooks: bool | None = None
+        self._dirty = True
+        self._mouse_pos = -1, -1
+        self._skipped_frames = 0
+        self._origin = 0, 0
+        self._tracking = False
+        self._journal: Journal[T] | None = None
+        self._export: GridExport[T] | None = None
+        self._zobrist: Zobrist[T] | None = None
+        self._region_sums: RegionSums[T] | None = None
+        self._scheduler: CellScheduler | None = None
+        self._wake_radius: int | None = None
+        self._ticking: tuple[int, int] | None = None
+        self._tasks: list[Task[Any]] = []
+        self._draw_steps: list[tuple[str, Callable[[], None]]] | None = None
+        self._row_coords: list[tuple[int, int]] = []
+        self._col_coords: list[tuple[int, int]] = []
+        self.batch_fills = True  # whether filled cells are merged into larger rectangles
         super().__init__()
 
     @property
@@ -149,6 +1072,437 @@ class PyxelGrid(Generic[T]):
         """The number of layers."""
         return self._layerc
 
+    @property
+    def animating(self) -> bool:
+        """Whether the game is currently animating, i.e., frames shouldn't be skipped as idle
+        even if nothing changed.
+
+        This is intended to be overridden.
+        """
+        return False
+
+    @property
+    def skipped_frames(self) -> int:
+        """The number of idle frames whose drawing was skipped so far."""
+        return self._skipped_frames
+
+    def request_redraw(self) -> None:
+        """Makes sure the next frame is drawn, even if it would otherwise be skipped as idle."""
+        self._dirty = True
+        if self._latency_stats is not None:
+            self._latency_stats.changed()
+
+    @property
+    def frame_stats(self) -> FrameStats | None:
+        """The frame timings collected so far, or `None` if they aren't being collected."""
+        return self._frame_stats
+
+    def enable_frame_stats(self) -> None:
+        """Starts collecting frame timings, which are printed to stderr when the program exits."""
+        if self._frame_stats is None:
+            self._frame_stats = stats = FrameStats()
+            atexit.register(lambda: print(stats.report(), file=sys.stderr))
+
+    @property
+    def latency_stats(self) -> LatencyStats | None:
+        """The input-to-display latencies measured so far, or `None` if they aren't being
+        measured."""
+        return self._latency_stats
+
+    def enable_latency_stats(self) -> None:
+        """Starts measuring how long it takes for input events to show on screen, which is
+        printed to stderr when the program exits; see `LatencyStats`.
+
+        A change counts if it's a cell change (including ones reported via `_changed()`) or a call
+        to `request_redraw()`.
+        """
+        if self._latency_stats is None:
+            self._latency_stats = stats = LatencyStats(type(self).__name__)
+            self._tracking = True
+            atexit.register(lambda: print(stats.report(), file=sys.stderr))
+
+    @property
+    def allocation_stats(self) -> AllocationStats | None:
+        """The allocations traced so far, or `None` if they aren't being traced."""
+        return self._allocation_stats
+
+    def enable_allocation_stats(self, top: int = _ALLOCATION_SITES,
+            snapshot_every: int = _SNAPSHOT_EVERY) -> None:
+        """Starts tracing memory allocations per frame phase, which are printed to stderr when the
+        program exits along with the `top` allocation sites of each phase.
+
+        This starts tracemalloc, which slows everything down considerably; frame timings taken
+        at the same time aren't representative.
+        """
+        if self._allocation_stats is None:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._allocation_stats = stats = AllocationStats(top, snapshot_every)
+            atexit.register(lambda: print(stats.report(), file=sys.stderr))
+
+    @property
+    def cell_costs(self) -> CellCosts | None:
+        """The drawing time of each cell so far, or `None` if it isn't being measured."""
+        return self._cell_costs
+
+    def enable_cell_costs(self, category: Callable[[T], Hashable] = repr,
+            top: int = _COSTLY_CELLS, heatmap: bool = True) -> None:
+        """Starts timing every call to `fill_cell()`, `draw_cell()` and `draw_cell_layer()`.
+
+        The time is added up per cell and per `category(state)` of the cell's state (e.g., its
+        type), and the `top` most expensive cells and categories are printed to stderr when the
+        program exits. With `heatmap`, each cell is also tinted over the drawn grid according to
+        its average cost so far, from blue (cheap) to red (the most expensive cell); this can be
+        turned off and on via `cell_costs.heatmap`.
+
+        The batched rectangles of filled cells aren't drawn per cell, so they aren't timed.
+        """
+        if self._cell_costs is None:
+            self._cell_costs = costs = CellCosts(self.r, self.c, top, heatmap)
+            self._cost_category = category
+            self._draw_steps = None
+            atexit.register(lambda: print(costs.report(), file=sys.stderr))
+
+    def _cell_category(self, i: int, j: int) -> Hashable:
+        if (state := self._cell_state.get((i, j), UNSET)) is UNSET:
+            return UNSET
+        return self._cost_category(state)
+
+    def _timed(self, hook: Callable[..., R]) -> Callable[..., R]:
+        if (costs := self._cell_costs) is None:
+            return hook
+        return costs.timed(hook, self._cell_category)
+
+    def _draw_heatmap(self) -> None:
+        assert (costs := self._cell_costs) is not None
+        highest = max(map(max, costs.cells))
+        if not costs.heatmap or highest <= 0:
+            return
+        dim = self.dim
+        levels = len(_HEAT_COLORS)
+        cols = self._col_coords
+        pyx.dither(0.5)
+        for i, y in self._row_coords:
+            row = costs.cells[i]
+            for j, x in cols:
+                if (cost := row[j]) > 0:
+                    level = min(levels - 1, int(cost / highest * levels))
+                    pyx.rect(x, y, dim, dim, _HEAT_COLORS[level])
+        pyx.dither(1.0)
+
+    def _phase(self, name: str) -> AbstractContextManager[None]:
+        if (stats := self._allocation_stats) is None:
+            return _NO_PHASE
+        return stats.phase(name)
+
+    @property
+    def origin(self) -> tuple[int, int]:
+        """The screen position of the grid's top-left corner (including padding), in pixels.
+
+        This is `(0, 0)` unless the grid shares a larger screen with others; see `set_origin()`.
+        """
+        return self._origin
+
+    def set_origin(self, x: int, y: int) -> None:
+        """Moves the whole grid so that its top-left corner (including padding) is drawn at screen
+        position `(x, y)`.
+
+        Drawing is offset via `pyxel.camera`, and `mouse_cell()` takes the offset into account, so
+        the drawing hooks don't need to change.
+        """
+        self._origin = x, y
+        self.request_redraw()
+
+    def set_geometry(self, *, dim: int | None = None, x_l: int | None = None,
+            x_r: int | None = None, y_u: int | None = None, y_d: int | None = None) -> None:
+        """Changes the size of the cells and/or the padding; the values not given are kept.
+
+        The screen isn't resized, so this is mostly useful before `run()`, or when the grid shares
+        a larger screen with others (see `set_origin()`).
+        """
+        if dim is not None: self._dim = dim
+        if x_l is not None: self._x_l = x_l
+        if x_r is not None: self._x_r = x_r
+        if y_u is not None: self._y_u = y_u
+        if y_d is not None: self._y_d = y_d
+        self._draw_steps = None
+        self.request_redraw()
+
+    @property
+    def journal(self) -> Journal[T] | None:
+        """The journal of cell changes, or `None` if changes aren't being recorded."""
+        return self._journal
+
+    def enable_journal(self, max_entries: int | None = _JOURNAL_ENTRIES,
+            max_changes: int | None = None) -> None:
+        """Starts recording cell changes for `undo()` and `redo()`.
+
+        Once there are more than `max_entries` entries or `max_changes` changed cells in the
+        history, the oldest entries are discarded. `None` means no limit.
+        """
+        self._journal = Journal(max_entries, max_changes)
+        self._tracking = True
+
+    def clear_journal(self) -> None:
+        """Forgets the undo and redo history, e.g., when starting a new game."""
+        if self._journal is not None:
+            self._journal.clear()
+
+    @contextmanager
+    def transaction(self) -> Generator[None, None, None]:
+        """Groups the cell changes made inside the `with` block into a single journal entry.
+
+        Transactions can be nested; only the outermost one creates an entry. This does nothing if
+        the journal isn't enabled.
+        """
+        if (journal := self._journal) is None:
+            yield
+            return
+        journal.begin()
+        try:
+            yield
+        finally:
+            journal.commit()
+
+    @contextmanager
+    def unrecorded(self) -> Generator[None, None, None]:
+        """Keeps the cell changes made inside the `with` block out of the journal, e.g., for
+        changes that the player shouldn't be able to undo.
+
+        This does nothing if the journal isn't enabled.
+        """
+        if (journal := self._journal) is None:
+            yield
+            return
+        paused, journal.paused = journal.paused, True
+        try:
+            yield
+        finally:
+            journal.paused = paused
+
+    def undo(self) -> bool:
+        """Reverts the most recent journal entry. Returns whether there was anything to undo."""
+        if self._journal is None or (entry := self._journal.pop_undo()) is None:
+            return False
+        self._replay((ij, old) for ij, old, _ in reversed(entry))
+        return True
+
+    def redo(self) -> bool:
+        """Reapplies the most recently undone journal entry. Returns whether there was anything
+        to redo."""
+        if self._journal is None or (entry := self._journal.pop_redo()) is None:
+            return False
+        self._replay((ij, new) for ij, _, new in entry)
+        return True
+
+    def _replay(self, states: Iterable[tuple[tuple[int, int], T | Unset]]) -> None:
+        with self.unrecorded():
+            for ij, state in states:
+                if isinstance(state, Unset):
+                    self.pop(ij)
+                else:
+                    self[ij] = state
+                self.replayed_cell(*ij)
+
+    @property
+    def export(self) -> GridExport[T] | None:
+        """The shared memory copy of the cells, or `None` if they aren't being exported."""
+        return self._export
+
+    def enable_export(self, encode: Callable[[T], int], name: str | None = None) -> str:
+        """Starts mirroring the cells into shared memory, and returns its name.
+
+        Other processes can attach to it with `GridExportReader(name)`. Each state is stored as the
+        32-bit int `encode(state)`. The changes made during a frame are published together at the
+        end of its update. The shared memory is removed when the program exits.
+        """
+        if self._export is not None:
+            return self._export.name
+        self._export = export = GridExport(self.r, self.c, encode, name)
+        for i in range(self.r):
+            for j in range(self.c):
+                try:
+                    export.write((i, j), self[i, j])
+                except IndexError:
+                    export.write((i, j), UNSET)
+        self._tracking = True
+        atexit.register(export.close)
+        return export.name
+
+    def enable_state_hash(self, seed: int = _ZOBRIST_SEED) -> None:
+        """Starts maintaining a hash of the cells' states; see `state_hash()`.
+
+        This walks every cell once; afterwards, every change updates the hash in constant time.
+        """
+        if self._zobrist is not None:
+            return
+        self._zobrist = zobrist = Zobrist[T](seed)
+        for i in range(self.r):
+            for j in range(self.c):
+                try:
+                    zobrist.update((i, j), UNSET, self[i, j])
+                except IndexError:
+                    pass
+        self._tracking = True
+
+    def state_hash(self) -> int:
+        """Returns a 64-bit hash of every cell's state, e.g., to cache results per board or to
+        detect repeated positions.
+
+        Equal boards have equal hashes, even across runs (see `Zobrist`), and different boards
+        have different hashes with overwhelming probability. The first call enables the hash via
+        `enable_state_hash()` and takes time proportional to the number of cells; later calls take
+        constant time.
+        """
+        if self._zobrist is None:
+            self.enable_state_hash()
+        assert self._zobrist is not None
+        return self._zobrist.value
+
+    def enable_region_sums(self, project: Callable[[T], int]) -> None:
+        """Starts maintaining the sums of `project(state)` over the cells, for `region_sum()`.
+
+        This walks every cell once; afterwards, every change updates the sums in O(log r * log c)
+        time. Enabling it again with another projection replaces the previous one.
+        """
+        values = [[0] * self.c for _ in range(self.r)]
+        for i in range(self.r):
+            for j in range(self.c):
+                try:
+                    values[i][j] = project(self[i, j])
+                except IndexError:
+                    pass
+        self._region_sums = sums = RegionSums[T](self.r, self.c, project)
+        sums.build(values)
+        self._tracking = True
+
+    def disable_region_sums(self) -> None:
+        """Stops maintaining the region sums, so that changes no longer pay for updating them."""
+        self._region_sums = None
+
+    def region_sum(self, i0: int, j0: int, i1: int, j1: int) -> int:
+        """Returns the sum of the projected states (see `enable_region_sums()`) of rows `i0` to
+        `i1 - 1` and columns `j0` to `j1 - 1`, in O(log r * log c) time.
+
+        The parts of the region outside the grid are ignored, and uninitialized cells count as 0.
+        This raises a `RuntimeError` if region sums aren't enabled.
+        """
+        if self._region_sums is None:
+            raise RuntimeError("Region sums aren't enabled; call enable_region_sums() first")
+        return self._region_sums.sum(i0, j0, i1, j1)
+
+    def enable_cell_updates(self, wake_radius: int | None = 1) -> None:
+        """Starts calling `update_cell()` for the cells that are scheduled, every frame after
+        `update()`.
+
+        A cell is scheduled with `wake()`, by returning a number of frames from `update_cell()`,
+        or, unless `wake_radius` is `None`, whenever a cell within `wake_radius` cells of it
+        (in both directions; 0 means only the cell itself) is written. Writes made by a cell's
+        own `update_cell()` don't wake that cell. Only the scheduled cells are visited, so the
+        cost per frame is proportional to how many cells are active.
+        """
+        if self._scheduler is None:
+            self._scheduler = CellScheduler()
+        self._wake_radius = wake_radius
+        self._tracking = True
+
+    @property
+    def active_cells(self) -> int:
+        """The number of cells currently scheduled for `update_cell()`."""
+        return 0 if self._scheduler is None else len(self._scheduler)
+
+    def wake(self, i: int, j: int, frames: int = 0) -> None:
+        """Schedules cell `(i, j)` for `update_cell()`, `frames` frames after the next cell update
+        phase (i.e., the current frame's if called from `update()`).
+
+        If the cell is already scheduled, it's rescheduled for then instead, whether that's sooner
+        or later. This raises a `RuntimeError` if cell updates aren't enabled.
+        """
+        if self._scheduler is None:
+            raise RuntimeError("Cell updates aren't enabled; call enable_cell_updates() first")
+        self.check_in_bounds(i, j)
+        self._scheduler.reschedule((i, j), self._scheduler.tick + max(0, frames))
+
+    def clear_cell_updates(self) -> None:
+        """Unschedules every cell, e.g., when starting a new game."""
+        if self._scheduler is not None:
+            self._scheduler.clear()
+
+    def _wake_around(self, ij: tuple[int, int]) -> None:
+        assert (scheduler := self._scheduler) is not None
+        assert (radius := self._wake_radius) is not None
+        i, j = ij
+        tick = scheduler.tick
+        for ni in range(max(i - radius, 0), min(i + radius + 1, self.r)):
+            for nj in range(max(j - radius, 0), min(j + radius + 1, self.c)):
+                if (ni, nj) != self._ticking:
+                    scheduler.schedule((ni, nj), tick)
+
+    def _update_cells(self) -> None:
+        assert (scheduler := self._scheduler) is not None
+        tick = scheduler.tick
+        update_cell = self.update_cell
+        try:
+            for ij in scheduler.take_due():
+                self._ticking = ij
+                if (frames := update_cell(*ij)) is not None:
+                    scheduler.schedule(ij, tick + max(1, frames))
+        finally:
+            self._ticking = None
+
+    def submit(self, fn: Callable[..., R], *args: Any, callback: Callable[[R], None] | None = None,
+            process: bool = False) -> Task[R]:
+        """Runs `fn(*args)` in the background and returns a handle to it.
+
+        When `fn` returns, `callback` is called with its result on the main thread, at the start
+        of the next frame's update. If `fn` raises an exception, it's re-raised there instead.
+
+        `fn` runs in a thread pool by default. CPU-heavy functions can pass `process=True` to run
+        in a process pool instead, in which case `fn`, its arguments and its result must be
+        picklable. Either way, `fn` must not use pyxel or this grid.
+        """
+        task = Task(_executor(process).submit(fn, *args), callback)
+        self._tasks.append(task)
+        return task
+
+    def cancel_tasks(self) -> None:
+        """Cancels every pending task."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+
+    def _deliver_tasks(self) -> None:
+        if not self._tasks:
+            return
+        finished: list[Task[Any]] = []
+        pending: list[Task[Any]] = []
+        for task in self._tasks:
+            (finished if task.done else pending).append(task)
+        self._tasks = pending
+        for task in finished:
+            if not task.cancelled:
+                task._deliver()  # pyright: ignore[reportPrivateUsage]
+
+    def _changed(self, ij: tuple[int, int], old: T | Unset, new: T | Unset) -> None:
+        """Reports that the state of cell `ij` changed from `old` to `new`.
+
+        This is called by `__setitem__` and `pop` while anything (e.g., the journal, the export or
+        the state hash) is tracking changes. Subclasses that store their state elsewhere should
+        call it themselves whenever `_tracking` is true.
+        """
+        if self._journal is not None:
+            self._journal.record(ij, old, new)
+        if self._export is not None:
+            self._export.write(ij, new)
+        if self._zobrist is not None:
+            self._zobrist.update(ij, old, new)
+        if self._region_sums is not None:
+            self._region_sums.update(ij, new)
+        if self._latency_stats is not None:
+            self._latency_stats.changed()
+        if self._wake_radius is not None and self._scheduler is not None:
+            self._wake_around(ij)
+
     def run(self, **options: Any) -> None:
         """Initialize and run the game.
 
@@ -158,7 +1512,8 @@ class PyxelGrid(Generic[T]):
         """
         pyx.init(self.width, self.height, **options)
         self.init()
-        pyx.run(self.update, self._draw)
+        self._build_draw()
+        pyx.run(self._update, self._draw)
 
     def in_bounds(self, i: int, j: int) -> bool:
         """Returns whether cell `(i, j)` is inside the grid or not."""
@@ -170,7 +1525,8 @@ class PyxelGrid(Generic[T]):
         Note that the coordinates returned may be "outside" the grid; use the `in_bounds()` method
         to check whether the cell is inside the grid or not.
         """
-        return (pyx.mouse_y - self.y_u) // self.dim, (pyx.mouse_x - self.x_l) // self.dim
+        ox, oy = self._origin
+        return (pyx.mouse_y - oy - self.y_u) // self.dim, (pyx.mouse_x - ox - self.x_l) // self.dim
 
     def check_in_bounds(self, i: int, j: int) -> None:
         """Raises an IndexError if cell `(i, j)` is outside the grid."""
@@ -197,7 +1553,11 @@ class PyxelGrid(Generic[T]):
         self.check_in_bounds(*ij)
         if ij not in self._cell_state:
             raise IndexError(f"Cell {ij} is not yet initialized")
-        return self._cell_state.pop(ij)
+        self._dirty = True
+        state = self._cell_state.pop(ij)
+        if self._tracking:
+            self._changed(ij, state, UNSET)
+        return state
 
     def __setitem__(self, ij: tuple[int, int], state: T) -> None:
         """Sets the "state" of cell `(i, j)` to the given value.
@@ -205,6 +1565,9 @@ class PyxelGrid(Generic[T]):
         This raises an `IndexError` if `(i, j)` is outside the grid.
         """
         self.check_in_bounds(*ij)
+        self._dirty = True
+        if self._tracking:
+            self._changed(ij, self._cell_state.get(ij, UNSET), state)
         self._cell_state[ij] = state
 
     def y(self, i: int) -> int:
@@ -242,25 +1605,216 @@ class PyxelGrid(Generic[T]):
         return round(self.y(self.r) + self.y_d)
 
     def _draw_grid(self) -> None:
-        for i, j in product(range(self.r), range(self.c)):
-            self.draw_cell(i, j, self.x(j), self.y(i))
+        draw_cell = self._timed(self.draw_cell)
+        cols = self._col_coords
+        for i, y in self._row_coords:
+            for j, x in cols:
+                draw_cell(i, j, x, y)
 
     def _draw_layer(self, layeri: int) -> None:
-        for i, j in product(range(self.r), range(self.c)):
-            self.draw_cell_layer(i, j, self.x(j), self.y(i), layeri)
+        draw_cell_layer = self._timed(self.draw_cell_layer)
+        cols = self._col_coords
+        for i, y in self._row_coords:
+            for j, x in cols:
+                draw_cell_layer(i, j, x, y, layeri)
+
+    def _draw_filled_grid(self) -> None:
+        fill_cell = self._timed(self.fill_cell)
+        draw_cell = self._timed(self.draw_cell)
+        dim = self.dim
+        cols = self._col_coords
+
+        if not self.batch_fills:
+            for i, y in self._row_coords:
+                for j, x in cols:
+                    if (color := fill_cell(i, j)) is None:
+                        draw_cell(i, j, x, y)
+                    else:
+                        pyx.rect(x, y, dim, dim, color)
+            return
+
+        fills: list[list[int | None]] = []
+        for i, y in self._row_coords:
+            row: list[int | None] = []
+            for j, x in cols:
+                if (color := fill_cell(i, j)) is None:
+                    draw_cell(i, j, x, y)
+                row.append(color)
+            fills.append(row)
+        self._draw_fills(fills)
+
+    def _draw_fills(self, fills: list[list[int | None]]) -> None:
+        # Covers the filled cells with as few rectangles as is easy to find. Rectangles of the same
+        # color may overlap, since drawing a cell twice in the same color changes nothing.
+        r, c, dim = self.r, self.c, self.dim
+        xs = [x for _, x in self._col_coords]
+        ys = [y for _, y in self._row_coords]
+
+        # if every cell is filled, the most common color goes under everything as a single rect
+        background: int | None = None
+        counts = Counter(color for row in fills for color in row)
+        if None not in counts:
+            most_common = max((color for color in counts if color is not None),
+                    key=counts.__getitem__)
+            pyx.rect(xs[0], ys[0], c * dim, r * dim, most_common)
+            background = most_common
+
+        # runs of two or more cells in a row, merged with the same runs in the rows below
+        covered = [[False] * c for _ in range(r)]
+        growing: dict[tuple[int, int, int], int] = {}
+        for i, row in enumerate(fills):
+            runs: dict[tuple[int, int, int], int] = {}
+            j = 0
+            while j < c:
+                color = row[j]
+                end = j + 1
+                while end < c and row[end] == color:
+                    end += 1
+                if color is not None and color != background and end - j >= 2:
+                    runs[j, end, color] = growing.pop((j, end, color), i)
+                    covered[i][j:end] = [True] * (end - j)
+                j = end
+            for (j0, j1, color), top in growing.items():
+                pyx.rect(xs[j0], ys[top], (j1 - j0) * dim, (i - top) * dim, color)
+            growing = runs
+        for (j0, j1, color), top in growing.items():
+            pyx.rect(xs[j0], ys[top], (j1 - j0) * dim, (r - top) * dim, color)
+
+        # the remaining cells, as runs down the columns (through covered cells too)
+        for j in range(c):
+            i = 0
+            while i < r:
+                color = fills[i][j]
+                end = i + 1
+                needed = not covered[i][j]
+                while end < r and fills[end][j] == color:
+                    needed = needed or not covered[end][j]
+                    end += 1
+                if needed and color is not None and color != background:
+                    pyx.rect(xs[j], ys[i], dim, (end - i) * dim, color)
+                i = end
+
+    def _build_draw(self) -> list[tuple[str, Callable[[], None]]]:
+        """Builds the list of steps that draw a frame, and precomputes the cells' coordinates.
+
+        The drawing hooks that the subclass doesn't override do nothing, so they're left out; e.g.,
+        the cells aren't even iterated over if neither `draw_cell` nor `draw_cell_layer` is
+        overridden. This is done once, and again only if the geometry changes.
+        """
+        cls = type(self)
+
+        def overridden(*names: str) -> bool:
+            return any(getattr(cls, name) is not getattr(PyxelGrid, name) for name in names)
+
+        self._row_coords = [(i, self.y(i)) for i in range(self.r)]
+        self._col_coords = [(j, self.x(j)) for j in range(self.c)]
+
+        steps: list[tuple[str, Callable[[], None]]] = []
+        if overridden('pre_draw_grid'):
+            steps.append(('pre_draw_grid', self.pre_draw_grid))
+        if overridden('fill_cell'):
+            steps.append(('draw_grid', self._draw_filled_grid))
+        elif overridden('draw_cell', '_draw_grid'):
+            steps.append(('draw_grid', self._draw_grid))
+        if overridden('post_draw_grid'):
+            steps.append(('post_draw_grid', self.post_draw_grid))
+        for layeri in range(self.layerc):
+            if overridden('pre_draw_layer'):
+                steps.append((f'pre_draw_layer {layeri}', partial(self.pre_draw_layer, layeri)))
+            if overridden('draw_cell_layer', '_draw_layer'):
+                steps.append((f'draw_layer {layeri}', partial(self._draw_layer, layeri)))
+            if overridden('post_draw_layer'):
+                steps.append((f'post_draw_layer {layeri}', partial(self.post_draw_layer, layeri)))
+
+        if self._cell_costs is not None:
+            steps.append(('heatmap', self._draw_heatmap))
+
+        self._draw_steps = steps
+        return steps
+
+    def _update(self) -> None:
+        """Updates the game state by one frame.
+
+        This is intended to be passed to `pyxel.run`.
+        """
+        if self._skip_idle_frames:
+            mouse_pos = pyx.mouse_x, pyx.mouse_y
+            if mouse_pos != self._mouse_pos or pyx.mouse_wheel or _input_event():
+                self._mouse_pos = mouse_pos
+                self._dirty = True
+
+        if self._allocation_stats is not None:
+            self._allocation_stats.start_frame()
+        if (latency := self._latency_stats) is not None:
+            latency.start_update(perf_counter(), pyx.frame_count, _input_event())
+
+        if (stats := self._frame_stats) is None:
+            self._update_frame()
+        else:
+            start = perf_counter()
+            self._update_frame()
+            stats.add_update(start, perf_counter())
+
+        if latency is not None:
+            latency.end_update(perf_counter())
+
+    def _update_frame(self) -> None:
+        with self._phase('update'):
+            self._deliver_tasks()
+            self.update()
+            if self._scheduler is not None:
+                self._update_cells()
+        if self._export is not None:
+            self._export.publish(pyx.frame_count)
 
     def _draw(self) -> None:
         """Draws the whole grid for a given frame.
 
         This is intended to be passed to `pyxel.run`.
         """
-        self.pre_draw_grid()
-        self._draw_grid()
-        self.post_draw_grid()
-        for layeri in range(self.layerc):
-            self.pre_draw_layer(layeri)
-            self._draw_layer(layeri)
-            self.post_draw_layer(layeri)
+        if self._skip_idle_frames:
+            if self._idle():
+                self._skipped_frames += 1
+                if self._frame_stats is not None:
+                    self._frame_stats.add_skip()
+                return
+            self._dirty = False
+
+        if (stats := self._frame_stats) is None:
+            self._draw_frame()
+        else:
+            start = perf_counter()
+            self._draw_frame()
+            stats.add_draw(start, perf_counter())
+
+        if self._latency_stats is not None:
+            self._latency_stats.displayed(perf_counter(), pyx.frame_count)
+
+    def _idle(self) -> bool:
+        if self._animated_hooks is None:
+            self._animated_hooks = any(getattr(getattr(type(self), name), _ANIMATED_ATTR, False)
+                    for name in _DRAW_HOOKS)
+        return not (self._dirty or self.animating or self._animated_hooks)
+
+    def _draw_frame(self) -> None:
+        ox, oy = self._origin
+        if ox or oy:
+            pyx.camera(-ox, -oy)
+
+        if (steps := self._draw_steps) is None:
+            steps = self._build_draw()
+        if self._cell_costs is not None:
+            self._cell_costs.frames += 1
+        if (stats := self._allocation_stats) is None:
+            for _, step in steps:
+                step()
+        else:
+            for name, step in steps:
+                with stats.phase(name):
+                    step()
+
+        if ox or oy:
+            pyx.camera()
 
     def init(self) -> None:
         """Initializes the game, before running it.
@@ -275,12 +1829,38 @@ class PyxelGrid(Generic[T]):
     def update(self) -> None:
         """Updates the game state by one frame.
 
-        This is intended to be passed to `pyxel.run`.
+        This is called every frame, before drawing.
+
+        This is intended to be overridden.
+        """
+        pass
+
+    def update_cell(self, i: int, j: int) -> int | None:
+        """Updates cell `(i, j)`, which was scheduled for this frame; see `enable_cell_updates()`.
+
+        Returns the number of frames until the cell should be updated again, or `None` to let it
+        sleep until it's woken up.
+
+        This is intended to be overridden.
+        """
+        return None
+
+    def replayed_cell(self, i: int, j: int) -> None:
+        """Called after `undo()` or `redo()` sets cell `(i, j)`, e.g., to `wake()` it.
 
         This is intended to be overridden.
         """
         pass
 
+    def fill_cell(self, i: int, j: int) -> int | None:
+        """Returns the color to fill cell `(i, j)` of the main grid with, or `None` to draw it with
+        `draw_cell()` instead.
+
+        Filled cells are drawn in batches, with as few `pyxel.rect` calls as possible. This is
+        intended to be overridden.
+        """
+        return None
+
     def draw_cell(self, i: int, j: int, x: int, y: int) -> None:
         """Draws cell `(i, j)` in the main grid.
 
@@ -0,0 +1,184 @@
+# pyright: strict
+
+from random import Random
+
+import pytest
+
+import pyxelgrid as pg
+
+
+def naive_sum(values: list[list[int]], i0: int, j0: int, i1: int, j1: int) -> int:
+    return sum(values[i][j] for i in range(max(i0, 0), min(i1, len(values)))
+            for j in range(max(j0, 0), min(j1, len(values[0]))))
+
+
+@pytest.mark.parametrize('r, c', [(1, 1), (1, 7), (5, 1), (6, 9), (16, 16)])
+def test_region_sums(r: int, c: int) -> None:
+    rand = Random(r * 100 + c)
+    values = [[rand.randrange(-5, 10) for _ in range(c)] for _ in range(r)]
+    sums = pg.RegionSums[int](r, c, int)
+    sums.build(values)
+    for _ in range(200):
+        i, j = rand.randrange(r), rand.randrange(c)
+        values[i][j] = rand.randrange(-5, 10)
+        sums.update((i, j), values[i][j])
+
+        i0, i1 = sorted((rand.randrange(-1, r + 2), rand.randrange(-1, r + 2)))
+        j0, j1 = sorted((rand.randrange(-1, c + 2), rand.randrange(-1, c + 2)))
+        assert sums.sum(i0, j0, i1, j1) == naive_sum(values, i0, j0, i1, j1)
+
+    for i0 in range(r + 1):
+        for i1 in range(i0, r + 1):
+            assert sums.sum(i0, 0, i1, c) == naive_sum(values, i0, 0, i1, c)
+
+
+def test_region_sums_follow_the_grid() -> None:
+    grid = pg.PyxelGrid[int](4, 5)
+    grid[1, 1] = 3
+    grid[2, 3] = 4
+    grid.enable_region_sums(lambda state: state * 10)
+    assert grid.region_sum(0, 0, 4, 5) == 70
+
+    grid[1, 1] = 1
+    grid[3, 4] = 2
+    assert grid.region_sum(0, 0, 4, 5) == 70
+    assert grid.region_sum(1, 1, 3, 4) == 50
+    grid.pop((2, 3))
+    assert grid.region_sum(0, 0, 4, 5) == 30
+    assert grid.region_sum(2, 2, 2, 5) == 0
+
+    grid.disable_region_sums()
+    with pytest.raises(RuntimeError):
+        grid.region_sum(0, 0, 4, 5)
+
+
+@pytest.mark.parametrize('slots', [1, 4, 64])
+def test_scheduler_ticks_cells_when_due(slots: int) -> None:
+    # cells are scheduled sooner, later and again, across turns of a small wheel, which leaves
+    # stale and duplicate entries behind
+    rand = Random(slots)
+    scheduler = pg.CellScheduler(slots)
+    due: dict[tuple[int, int], int] = {}
+    for tick in range(300):
+        for _ in range(rand.randrange(4)):
+            ij = rand.randrange(3), rand.randrange(3)
+            when = tick + rand.randrange(3 * slots + 2)
+            if rand.random() < 0.5:
+                scheduler.schedule(ij, when)
+                due[ij] = min(due.get(ij, when), when)
+            else:
+                scheduler.reschedule(ij, when)
+                due[ij] = when
+        assert len(scheduler) == len(due)
+
+        ready = scheduler.take_due()
+        assert sorted(ready) == sorted(ij for ij, when in due.items() if when == tick)
+        for ij in ready:
+            del due[ij]
+    assert scheduler.tick == 300
+
+
+class Timers(pg.PyxelGrid[int]):
+    # cell (0, 0) ticks every 5 frames once woken; the others tick once per wake
+    def __init__(self) -> None:
+        super().__init__(3, 3)
+        self.frame = 0
+        self.ticked: list[tuple[int, int, int]] = []
+        self.enable_cell_updates(wake_radius=None)
+
+    def update_cell(self, i: int, j: int) -> int | None:
+        self.ticked.append((self.frame, i, j))
+        return 5 if (i, j) == (0, 0) else None
+
+
+def test_wake_reschedules() -> None:
+    grid = Timers()
+    grid.wake(0, 0)
+    grid.wake(1, 1, 10)
+    grid.wake(2, 2, 3)
+    for grid.frame in range(12):
+        if grid.frame == 2:
+            grid.wake(1, 1, 1)  # sooner
+            grid.wake(2, 2, 4)  # later
+        grid._update()  # pyright: ignore[reportPrivateUsage]
+    assert grid.ticked == [(0, 0, 0), (3, 1, 1), (5, 0, 0), (6, 2, 2), (10, 0, 0)]
+    assert grid.active_cells == 1
+
+
+def snapshot(grid: pg.PyxelGrid[int]) -> dict[tuple[int, int], int]:
+    cells: dict[tuple[int, int], int] = {}
+    for i in range(grid.r):
+        for j in range(grid.c):
+            try:
+                cells[i, j] = grid[i, j]
+            except IndexError:
+                pass
+    return cells
+
+
+def test_journal_round_trips() -> None:
+    rand = Random(34)
+    grid = pg.PyxelGrid[int](4, 4)
+    grid.enable_journal(max_entries=None)
+    history = [snapshot(grid)]
+    for _ in range(50):
+        with grid.transaction():
+            for _ in range(rand.randrange(1, 6)):
+                ij = rand.randrange(4), rand.randrange(4)
+                if ij in snapshot(grid) and rand.random() < 0.2:
+                    grid.pop(ij)
+                else:
+                    with grid.transaction():  # nested; still part of the outer entry
+                        grid[ij] = rand.randrange(3)
+        if snapshot(grid) != history[-1]:
+            history.append(snapshot(grid))
+
+    for state in reversed(history[:-1]):
+        assert grid.undo()
+        assert snapshot(grid) == state
+    assert not grid.undo()
+
+    for state in history[1:]:
+        assert grid.redo()
+        assert snapshot(grid) == state
+    assert not grid.redo()
+
+    # a new change after undoing forgets what could have been redone
+    grid.undo()
+    grid[0, 0] = 7
+    assert not grid.redo()
+    assert grid.undo()
+    assert snapshot(grid) == history[-2]
+
+
+def test_journal_skips_unrecorded_and_unchanged() -> None:
+    grid = pg.PyxelGrid[int](2, 2)
+    grid.enable_journal()
+    grid[0, 0] = 1
+    with grid.unrecorded():
+        grid[0, 1] = 2
+    with grid.transaction():
+        grid[1, 1] = 3
+        grid.pop((1, 1))
+    assert grid.journal is not None and len(grid.journal) == 1
+
+    assert grid.undo()
+    assert snapshot(grid) == {(0, 1): 2}
+    assert grid.redo()
+    assert snapshot(grid) == {(0, 0): 1, (0, 1): 2}
+
+
+def test_journal_is_bounded() -> None:
+    grid = pg.PyxelGrid[int](10, 10)
+    grid.enable_journal(max_entries=None, max_changes=25)
+    for k in range(10):
+        with grid.transaction():
+            for j in range(10):
+                grid[k, j] = k
+    journal = grid.journal
+    assert journal is not None
+    assert (len(journal), journal.changes) == (2, 20)
+
+    while grid.undo():
+        pass
+    assert snapshot(grid) == {(k, j): k for k in range(8) for j in range(10)}
@@ -0,0 +1,67 @@
+# pyright: strict
+
+"""Watches a running game's grid from another process, through `PyxelGrid.enable_export()`.
+
+This attaches to the shared memory of the exported grid and, every `--interval` seconds, prints
+how many frames have passed and a summary of the cell values, or with `--map`, the whole grid as
+text. Reading never slows the game down; see `GridExportReader`.
+
+.. highlight:: bash
+.. code-block:: bash
+
+    python counters/counters.py --export counters
+    python watch_grid.py counters --map
+"""
+
+from argparse import ArgumentParser
+from collections import Counter
+from time import sleep
+from typing import Final
+
+from pyxelgrid import EXPORT_UNSET, GridExportReader
+
+
+DEFAULT_INTERVAL: Final[float] = 1.0
+MAP_CHARS: Final[str] = ".123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def map_char(value: int) -> str:
+    if value == EXPORT_UNSET:
+        return ' '
+    return MAP_CHARS[value] if 0 <= value < len(MAP_CHARS) else '#'
+
+
+def main():
+    parser = ArgumentParser(description="Watch an exported grid of a running game.")
+
+    parser.add_argument('name', help="the name printed by the game when it started exporting")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument('--map', action='store_true', help="print the whole grid")
+    parser.add_argument('--top', type=int, default=5, help="the number of most common values")
+
+    args = parser.parse_args()
+
+    reader = GridExportReader(args.name)
+    try:
+        last_frame = None
+        while True:
+            frame, cells = reader.snapshot()
+            if frame != last_frame:
+                last_frame = frame
+                values = [cells[i, j] for i in range(reader.r) for j in range(reader.c)]
+                common = ', '.join(f"{value}: {count}"
+                        for value, count in Counter(values).most_common(args.top))
+                print(f"frame {frame}; {reader.r}x{reader.c} cells; most common: {common}")
+                if args.map:
+                    for i in range(reader.r):
+                        row = values[i * reader.c:(i + 1) * reader.c]
+                        print(''.join(map_char(value) for value in row))
+            sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == '__main__':
+    main()